@@ -0,0 +1,139 @@
+"""
+Micro-benchmark de las estrategias de lectura de duplicate_finder.hash_file.
+
+Crea archivos temporales de varios tamaños y mide MB/s de cada estrategia:
+  - iter-8k:  el bucle original, f.read(8192) dentro de iter(lambda ...)
+  - ri-64k / ri-1m / ri-4m: readinto sobre un buffer fijo reutilizado de ese tamaño
+  - auto:     readinto con el buffer elegido según el tamaño del archivo (default de hash_file)
+  - mmap:     el archivo completo mapeado en memoria
+
+Los archivos quedan en la caché de páginas del sistema tras la primera pasada, así que se mide
+el costo de CPU y de llamadas de Python, no la velocidad del disco.
+
+Uso:
+    python3 benchmarks/hash_benchmark.py --sizes 4K,256K,16M,256M --algorithm blake2b
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from rich.table import Table
+
+from automation_tools.core.logger import console
+from automation_tools.tools import duplicate_finder
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]} {unit}iB"
+    return f"{size} B"
+
+
+def legacy_hash(path: str, algorithm: str) -> Optional[str]:
+    """hash_file tal como era antes: bloques de 8 KiB leídos con iter(lambda ...)."""
+    hasher = duplicate_finder.new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def build_strategies(algorithm: str) -> Dict[str, Callable[[str], Optional[str]]]:
+    def mmap_hash(path: str) -> Optional[str]:
+        threshold, duplicate_finder.MMAP_MIN_SIZE = duplicate_finder.MMAP_MIN_SIZE, 1
+        try:
+            return duplicate_finder.hash_file(path, algorithm=algorithm, read_mode="mmap")
+        finally:
+            duplicate_finder.MMAP_MIN_SIZE = threshold
+
+    return {
+        "iter-8k": lambda p: legacy_hash(p, algorithm),
+        "ri-64k":  lambda p: duplicate_finder.hash_file(p, 64 * 1024, algorithm),
+        "ri-1m":   lambda p: duplicate_finder.hash_file(p, 1024 ** 2, algorithm),
+        "ri-4m":   lambda p: duplicate_finder.hash_file(p, 4 * 1024 ** 2, algorithm),
+        "auto":    lambda p: duplicate_finder.hash_file(p, algorithm=algorithm),
+        "mmap":    mmap_hash,
+    }
+
+
+def create_files(directory: str, size: int, total: int) -> List[str]:
+    """Suficientes archivos de `size` bytes para sumar al menos `total` bytes."""
+    paths = []
+    block = os.urandom(min(size, 4 * 1024 ** 2))
+    for i in range(max(1, total // size)):
+        path = os.path.join(directory, f"{size}_{i}.bin")
+        with open(path, "wb") as f:
+            written = 0
+            while written < size:
+                written += f.write(block[:size - written])
+        paths.append(path)
+    return paths
+
+
+def run_benchmark(args: argparse.Namespace) -> None:
+    sizes      = [parse_size(s) for s in args.sizes.split(",")]
+    strategies = build_strategies(args.algorithm)
+    total      = int(args.total_mb * 1024 ** 2)
+
+    table = Table(title=f"hash_file — {args.algorithm}, MB/s (mejor de {args.repeat})")
+    table.add_column("Tamaño", style="cyan", no_wrap=True)
+    table.add_column("Archivos", justify="right")
+    for name in strategies:
+        table.add_column(name, justify="right")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            paths    = create_files(tmp, size, total)
+            expected = legacy_hash(paths[0], args.algorithm)
+            row      = [format_size(size), str(len(paths))]
+            speeds   = {}
+            for name, strategy in strategies.items():
+                if strategy(paths[0]) != expected:
+                    raise SystemExit(f"La estrategia {name} devolvió un hash distinto")
+                best = float("inf")
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    for path in paths:
+                        strategy(path)
+                    best = min(best, time.perf_counter() - started)
+                speeds[name] = size * len(paths) / best / 1024 ** 2
+            fastest = max(speeds.values())
+            for name in strategies:
+                cell = f"{speeds[name]:,.0f}"
+                row.append(f"[bold green]{cell}[/bold green]" if speeds[name] == fastest else cell)
+            table.add_row(*row)
+            for path in paths:
+                os.remove(path)
+
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de lectura para hash_file")
+    parser.add_argument("--sizes",     default="4K,256K,16M,256M", help="Tamaños de archivo separados por coma (default: 4K,256K,16M,256M)")
+    parser.add_argument("--total-mb",  type=float, default=256, help="MB a hashear por tamaño; los tamaños pequeños usan muchos archivos (default: 256)")
+    parser.add_argument("--algorithm", choices=duplicate_finder.HASH_ALGORITHMS, default="blake2b",
+                        help="Algoritmo de hash (default: blake2b)")
+    parser.add_argument("--repeat",    type=int, default=3, help="Repeticiones por estrategia; se reporta la mejor (default: 3)")
+    args = parser.parse_args()
+
+    run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Benchmark offline del monitor de precios.
+
+Levanta dos tiendas falsas en 127.0.0.1 (una tipo MercadoLibre y otra tipo Amazon) que sirven
+las páginas de benchmarks/fixtures con latencia, errores, 304 y 429 configurables, y ejecuta
+rondas completas de run_round contra miles de productos sintéticos.
+
+Uso:
+    python3 benchmarks/monitor_benchmark.py --products 2000 --rounds 2 --latency-ms 40
+"""
+import os
+import sys
+import time
+import logging
+import random
+import zlib
+import argparse
+import tempfile
+import threading
+import resource
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Any, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+# El log del benchmark va a un archivo temporal: configurar el logging raíz antes de importar
+# el monitor hace que su setup_logger no abra automation_tools.log en la raíz del proyecto
+BENCH_LOG_FILE = os.path.join(tempfile.gettempdir(), "monitor_benchmark.log")
+logging.basicConfig(filename=BENCH_LOG_FILE, filemode="w", level=logging.INFO,
+                    format="%(asctime)s [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+from automation_tools.core.logger import console
+from automation_tools.tools import monitor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class StoreState:
+    """Configuración y contadores compartidos por los handlers de una tienda falsa."""
+
+    def __init__(self, template: str, args: argparse.Namespace):
+        self.template = template
+        self.args     = args
+        self.filler   = "<div class=\"ui-recommendations\">" + ("<p>Producto relacionado</p>" * 40) + "</div>"
+        self.filler   = self.filler * max(1, int(args.page_kb * 1024 / len(self.filler)))
+        self.lock     = threading.Lock()
+        self.versions: Dict[str, int] = {}
+        self.status: Dict[int, int]   = {}
+
+    def count(self, code: int) -> None:
+        with self.lock:
+            self.status[code] = self.status.get(code, 0) + 1
+
+    def next_round(self) -> None:
+        """Cambia la versión de las páginas que 'cambiaron' entre rondas."""
+        with self.lock:
+            for key in self.versions:
+                if random.random() >= self.args.not_modified_rate:
+                    self.versions[key] += 1
+
+    def render(self, item_id: str, version: int) -> bytes:
+        price = 50_000 + (zlib.crc32(item_id.encode()) % 100_000) + version * 10
+        html  = (self.template
+                 .replace("{item_id}", item_id)
+                 .replace("{price}", str(price))
+                 .replace("{price_text}", f"{price:,}")
+                 .replace("{price_whole}", f"{price:,}")
+                 .replace("{filler}", self.filler))
+        return html.encode("utf-8")
+
+
+def make_handler(state: StoreState):
+    class StoreHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def _reply(self, code: int, body: bytes = b"", headers: Dict[str, str] = None) -> None:
+            state.count(code)
+            self.send_response(code)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            args = state.args
+            time.sleep(max(0.0, random.gauss(args.latency_ms, args.latency_ms / 4)) / 1000)
+
+            roll = random.random()
+            if roll < args.throttle_rate:
+                return self._reply(429, headers={"Retry-After": "1"})
+            if roll < args.throttle_rate + args.error_rate:
+                return self._reply(503)
+
+            item_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+            with state.lock:
+                version = state.versions.setdefault(item_id, 0)
+            etag = f'"{item_id}-{version}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._reply(304, headers={"ETag": etag})
+            self._reply(200, state.render(item_id, version), {"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+
+    return StoreHandler
+
+
+def start_store(template: str, args: argparse.Namespace) -> Tuple[ThreadingHTTPServer, StoreState]:
+    state  = StoreState(template, args)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def build_products(count: int, ml_port: int, amazon_port: int) -> List[Dict[str, Any]]:
+    products = []
+    for i in range(count):
+        if i % 2 == 0:
+            url = f"http://127.0.0.1:{ml_port}/mercadolibre/MCO-{100000 + i}"
+        else:
+            url = f"http://127.0.0.1:{amazon_port}/amazon/dp/B0{i:08d}"
+        products.append({"name": f"Producto {i}", "url": url, "target_price": 60_000, "alert_drop_percent": 5})
+    return products
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_benchmark(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    ml_server, ml_state   = start_store(load_fixture("mercadolibre.html"), args)
+    amz_server, amz_state = start_store(load_fixture("amazon.html"), args)
+    products = build_products(args.products, ml_server.server_port, amz_server.server_port)
+    settings = {
+        "currency_code": "COP",
+        "decimal_separator": ".",
+        "thousands_separator": ",",
+        "max_workers": args.workers,
+        "per_host_concurrency": args.per_host,
+        "request_delay_min": args.delay,
+        "request_delay_max": args.delay,
+        # Las tiendas locales no tienen hostname propio: se registran por host:puerto
+        "extractors": {
+            f"127.0.0.1:{ml_server.server_port}":  monitor.BUILTIN_EXTRACTORS["mercadolibre"],
+            f"127.0.0.1:{amz_server.server_port}": monitor.BUILTIN_EXTRACTORS["amazon"],
+        },
+    }
+
+    # Latencia por producto: se envuelve check_price, que run_round busca en el módulo en cada llamada
+    latencies: List[float] = []
+    latency_lock = threading.Lock()
+    original_check_price = monitor.check_price
+
+    def timed_check_price(*a: Any, **kw: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return original_check_price(*a, **kw)
+        finally:
+            with latency_lock:
+                latencies.append(time.perf_counter() - started)
+
+    sqlite_time = [0.0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        monitor.DB_FILE     = os.path.join(tmp, "bench.db")
+        monitor.check_price = timed_check_price
+        store               = monitor.get_store()
+        original_flush      = store.flush
+
+        def timed_flush() -> None:
+            started = time.perf_counter()
+            original_flush()
+            sqlite_time[0] += time.perf_counter() - started
+
+        store.flush   = timed_flush
+        console.quiet = not args.verbose
+        if args.trace_memory:
+            tracemalloc.start()
+        peak = 0
+        rounds: List[Tuple[float, int]] = []
+        try:
+            for number in range(args.rounds):
+                if number:
+                    ml_state.next_round()
+                    amz_state.next_round()
+                started = time.perf_counter()
+                results = monitor.run_round(products, settings)
+                rounds.append((time.perf_counter() - started, sum(1 for p in results.values() if p is not None)))
+        finally:
+            if args.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            console.quiet       = False
+            monitor.check_price = original_check_price
+            store.close()
+            ml_server.shutdown()
+            amz_server.shutdown()
+
+    total_time = sum(elapsed for elapsed, _ in rounds)
+    status = {code: ml_state.status.get(code, 0) + amz_state.status.get(code, 0)
+              for code in sorted(set(ml_state.status) | set(amz_state.status))}
+
+    console.print(f"\n[bold]Benchmark del monitor[/bold] — {args.products} productos × {args.rounds} ronda(s)")
+    for number, (elapsed, found) in enumerate(rounds, start=1):
+        console.print(f"  Ronda {number}: {elapsed:.2f}s — {found}/{args.products} precios — {args.products / elapsed:.1f} productos/s")
+    console.print(f"  Productos/s (total): [green]{args.products * len(rounds) / total_time:.1f}[/green]")
+    console.print(f"  Latencia por producto: p50 {percentile(latencies, 50) * 1000:.1f} ms · p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    # ru_maxrss está en KB en Linux (en bytes en macOS)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss = max_rss / 1024 if sys.platform != "darwin" else max_rss / (1024 * 1024)
+    console.print(f"  Memoria pico (RSS del proceso): {max_rss:.1f} MB")
+    if args.trace_memory:
+        console.print(f"  Memoria pico (tracemalloc): {peak / (1024 * 1024):.1f} MB")
+    console.print(f"  Escritura SQLite: {sqlite_time[0] * 1000:.1f} ms en total")
+    console.print(f"  Respuestas HTTP: {', '.join(f'{code}={n}' for code, n in status.items())}")
+    console.print(f"  Extracción (última ronda): {monitor.extraction_summary()}")
+    console.print(f"  Log del monitor: {BENCH_LOG_FILE}")
+    for line in monitor.get_extractor_registry(settings).summary():
+        console.print(f"  Selectores — {line}")
+    console.print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline del monitor de precios")
+    parser.add_argument("--products",          type=int,   default=2000, help="Productos sintéticos (default: 2000)")
+    parser.add_argument("--rounds",            type=int,   default=2,    help="Rondas a ejecutar (default: 2)")
+    parser.add_argument("--latency-ms",        type=float, default=40,   help="Latencia media por respuesta (default: 40)")
+    parser.add_argument("--error-rate",        type=float, default=0.01, help="Fracción de respuestas 503 (default: 0.01)")
+    parser.add_argument("--throttle-rate",     type=float, default=0.01, help="Fracción de respuestas 429 (default: 0.01)")
+    parser.add_argument("--not-modified-rate", type=float, default=0.8,  help="Fracción de páginas sin cambios entre rondas (default: 0.8)")
+    parser.add_argument("--page-kb",           type=float, default=300,  help="Tamaño aproximado de cada página en KB (default: 300)")
+    parser.add_argument("--workers",           type=int,   default=16,   help="max_workers del monitor (default: 16)")
+    parser.add_argument("--per-host",          type=int,   default=8,    help="per_host_concurrency del monitor (default: 8)")
+    parser.add_argument("--delay",             type=float, default=0.0,  help="Delay de cortesía por host en segundos (default: 0)")
+    parser.add_argument("--seed",              type=int,   default=1234, help="Semilla aleatoria (default: 1234)")
+    parser.add_argument("--trace-memory",      action="store_true",      help="Medir también el pico con tracemalloc (mucho más lento)")
+    parser.add_argument("--verbose",           action="store_true",      help="Mostrar la salida del monitor")
+    args = parser.parse_args()
+
+    run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -149,8 +149,17 @@ def menu_convertir():
         choices=["png", "jpg", "webp", "tiff", "bmp", "gif"],
     ).ask()
     
-    if fmt:
-        converter.run_image_converter(img_path, fmt)
+    if not fmt: return
+
+    if os.path.isdir(img_path) and questionary.confirm(
+        "¿Incluir subcarpetas y guardar en otra carpeta? (solo convierte lo nuevo o modificado)", default=False
+    ).ask():
+        out_dir = questionary.path("Carpeta de salida:", only_directories=True).ask()
+        if out_dir:
+            converter.run_mirror_converter(img_path, out_dir, fmt)
+        return
+
+    converter.run_image_converter(img_path, fmt)
 
 @error_boundary
 def menu_convertir_pdf():
@@ -198,8 +207,18 @@ def menu_detector_duplicados():
     directory = questionary.path("¿Qué carpeta quieres escanear?").ask()
     if not directory: return
     
-    delete = questionary.confirm("¿Eliminar duplicados automáticamente (conservando el original)?").ask()
-    duplicate_finder.run_duplicate_finder(directory, auto_delete=delete)
+    action = questionary.select(
+        "¿Qué hacer con las copias?",
+        choices=["Eliminarlas", "Reemplazarlas por hardlinks", "Reemplazarlas por reflinks (copy-on-write)"]
+    ).ask()
+    if not action: return
+
+    if action == "Eliminarlas":
+        delete = questionary.confirm("¿Eliminar duplicados automáticamente (conservando el original)?").ask()
+        duplicate_finder.run_duplicate_finder(directory, auto_delete=delete)
+    else:
+        link_mode = "hardlink" if "hardlinks" in action else "reflink"
+        duplicate_finder.run_duplicate_finder(directory, link_mode=link_mode)
 
 @error_boundary
 def menu_descargador_youtube():
@@ -1,8 +1,14 @@
 import argparse
+import hashlib
+import json
 import os
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from automation_tools.core.logger import console, print_error, print_step, print_success
+from rich.progress import Progress, TextColumn, BarColumn, MofNCompleteColumn, TimeRemainingColumn
+
+from automation_tools.core.logger import console, print_error, print_step, print_success, print_warning
 
 try:
     from PIL import Image
@@ -10,46 +16,137 @@ try:
 except ImportError:
     HAS_PILLOW = False
 
-def convert_single_file(input_path: str, output_format: str) -> bool:
-    """Convierte un único archivo de imagen."""
-    FORMAT_MAP = {
-        'jpg': 'JPEG',
-        'jpeg': 'JPEG',
-        'png': 'PNG',
-        'webp': 'WEBP',
-        'bmp': 'BMP',
-        'tiff': 'TIFF',
-        'gif': 'GIF',
-    }
-    
-    try:
-        pillow_format = FORMAT_MAP.get(output_format.lower())
-        if not pillow_format:
-            print_error(f"Formato de salida no soportado: {output_format}")
-            return False
+FORMAT_MAP = {
+    'jpg': 'JPEG',
+    'jpeg': 'JPEG',
+    'png': 'PNG',
+    'webp': 'WEBP',
+    'bmp': 'BMP',
+    'tiff': 'TIFF',
+    'gif': 'GIF',
+}
+SUPPORTED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tiff', '.gif')
+
+# Imágenes que se convierten en paralelo (una por proceso) al procesar una carpeta
+DEFAULT_CONVERT_WORKERS = os.cpu_count() or 1
 
-        if not HAS_PILLOW:
-            print_error("Pillow no está instalado. Instálalo con 'pip install Pillow'.")
-            return False
+# Modo espejo (--output-dir): registro de lo ya convertido, guardado en la carpeta de salida
+MANIFEST_FILE = ".manifiesto_conversion.json"
+SKIP_MODES = ["mtime", "fingerprint"]
 
+# Resultado de convertir una imagen: (entrada, salida, error o None)
+ConvertResult = Tuple[str, str, Optional[str]]
+
+def output_path_for(input_path: str, output_format: str) -> str:
+    """La imagen convertida se guarda junto a la original, con la nueva extensión."""
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    output_directory = os.path.dirname(input_path) if os.path.dirname(input_path) else '.'
+    return os.path.join(output_directory, f"{base_name}.{output_format.lower()}")
+
+def convert_image(input_path: str, output_format: str, output_path: Optional[str] = None) -> ConvertResult:
+    """Convierte una imagen sin escribir en consola, para poder ejecutarse en otro proceso.
+
+    Se escribe primero en un nombre temporal y luego se renombra, así una conversión cortada
+    a la mitad nunca deja un archivo de salida incompleto que parezca al día."""
+    output_path = output_path or output_path_for(input_path, output_format)
+    directory, name = os.path.split(output_path)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        pillow_format = FORMAT_MAP[output_format.lower()]
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         with Image.open(input_path) as img:
             if pillow_format == 'JPEG' and img.mode in ('RGBA', 'P', 'LA'):
                 img = img.convert('RGB')
-                
-            base_name = os.path.splitext(os.path.basename(input_path))[0]
-            output_directory = os.path.dirname(input_path) if os.path.dirname(input_path) else '.'
-            output_filename = f"{base_name}.{output_format.lower()}"
-            output_path = os.path.join(output_directory, output_filename)
-            
-            img.save(output_path, format=pillow_format)
-            
-        console.print(f"Convertida: '{input_path}' -> [green]'{output_path}'[/green]")
-        return True
+            img.save(temp_path, format=pillow_format)
+        os.replace(temp_path, output_path)
+        return input_path, output_path, None
     except Exception as e:
-        print_error(f"Error al convertir '{input_path}': {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return input_path, output_path, str(e) or type(e).__name__
+
+def check_format(output_format: str) -> bool:
+    if output_format.lower() not in FORMAT_MAP:
+        print_error(f"Formato de salida no soportado: {output_format}")
+        return False
+    if not HAS_PILLOW:
+        print_error("Pillow no está instalado. Instálalo con 'pip install Pillow'.")
         return False
+    return True
 
-def run_image_converter(input_path: str, output_format: str) -> None:
+def convert_single_file(input_path: str, output_format: str) -> bool:
+    """Convierte un único archivo de imagen."""
+    if not check_format(output_format):
+        return False
+
+    _, output_path, error = convert_image(input_path, output_format)
+    if error:
+        print_error(f"Error al convertir '{input_path}': {error}")
+        return False
+    console.print(f"Convertida: '{input_path}' -> [green]'{output_path}'[/green]")
+    return True
+
+def claim_outputs(files: List[str], output_format: str) -> Tuple[List[str], List[str]]:
+    """Separa las imágenes que se pueden convertir de las que chocarían con otra salida.
+
+    `foto.jpg` y `foto.png` a png generan la misma salida; en paralelo, un proceso podría leer
+    `foto.png` mientras otro la reemplaza. Primero reclaman su salida las imágenes que se
+    convierten sobre sí mismas, luego el resto en orden; las que no consiguen salida se omiten."""
+    outputs = {path: output_path_for(path, output_format) for path in files}
+    claimed = {os.path.normcase(path) for path in files if os.path.normcase(outputs[path]) == os.path.normcase(path)}
+    accepted, collisions = [], []
+    for path in files:
+        output = os.path.normcase(outputs[path])
+        if output == os.path.normcase(path):
+            accepted.append(path)
+        elif output in claimed:
+            collisions.append(path)
+        else:
+            claimed.add(output)
+            accepted.append(path)
+    return accepted, collisions
+
+def convert_batch(files: List[str], output_format: str, workers: int = DEFAULT_CONVERT_WORKERS,
+                  outputs: Optional[List[str]] = None) -> List[ConvertResult]:
+    """Convierte varias imágenes en un pool de procesos.
+
+    La decodificación y codificación de Pillow ocupan la CPU y no siempre liberan el GIL, así
+    que cada imagen va a un proceso distinto. Los resultados llegan en el mismo orden que
+    `files`, de modo que la consola muestra la misma secuencia con 1 o con 16 workers.
+    `outputs`, si se indica, da la ruta de salida de cada archivo."""
+    outputs = outputs or [output_path_for(path, output_format) for path in files]
+    results = []
+    columns = (TextColumn("[cyan]Convirtiendo"), BarColumn(), MofNCompleteColumn(), TimeRemainingColumn())
+    with Progress(*columns, console=console) as progress:
+        task = progress.add_task("", total=len(files))
+        if workers > 1 and len(files) > 1:
+            chunksize = max(1, min(16, len(files) // (workers * 4)))
+            pool = ProcessPoolExecutor(max_workers=workers)
+            converted = pool.map(convert_image, files, [output_format] * len(files), outputs, chunksize=chunksize)
+        else:
+            pool = None
+            converted = (convert_image(path, output_format, out) for path, out in zip(files, outputs))
+        try:
+            try:
+                for input_path, output_path, error in converted:
+                    if error:
+                        console.print(f"[red]Falló:[/red] '{input_path}': {error}")
+                    else:
+                        console.print(f"Convertida: '{input_path}' -> [green]'{output_path}'[/green]")
+                    results.append((input_path, output_path, error))
+                    progress.advance(task)
+            except BrokenProcessPool:
+                # Un proceso murió (p. ej. sin memoria): se conserva lo ya convertido
+                error = "el proceso de conversión terminó inesperadamente"
+                print_error(f"{error}; {len(files) - len(results)} imagen(es) sin convertir.")
+                results.extend((path, out, error) for path, out in zip(files[len(results):], outputs[len(results):]))
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+    return results
+
+def run_image_converter(input_path: str, output_format: str, workers: int = DEFAULT_CONVERT_WORKERS) -> None:
     """Core function to convert an image or directory of images."""
     if not os.path.exists(input_path):
         print_error(f"La ruta '{input_path}' no es válida.")
@@ -57,25 +154,193 @@ def run_image_converter(input_path: str, output_format: str) -> None:
 
     if os.path.isdir(input_path):
         print_step(f"Procesando directorio: {input_path}")
-        supported_extensions = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tiff', '.gif')
-        files = [f for f in os.listdir(input_path) if f.lower().endswith(supported_extensions)]
+        files = sorted(f for f in os.listdir(input_path) if f.lower().endswith(SUPPORTED_EXTENSIONS))
         
         if not files:
             print_error("No se encontraron imágenes soportadas en el directorio.")
             return
+        if not check_format(output_format):
+            return
 
-        success_count = 0
-        for file in files:
-            full_path = os.path.join(input_path, file)
-            if convert_single_file(full_path, output_format):
-                success_count += 1
-        
-        print_success(f"Proceso completado. {success_count}/{len(files)} imágenes convertidas.")
+        accepted, collisions = claim_outputs([os.path.join(input_path, f) for f in files], output_format)
+        results = convert_batch(accepted, output_format, workers)
+        failures = [(path, error) for path, _, error in results if error]
+
+        print_success(f"Proceso completado. {len(results) - len(failures)}/{len(files)} imágenes convertidas.")
+        if collisions:
+            print_warning(f"{len(collisions)} imagen(es) omitidas porque otra con el mismo nombre ya ocupa esa salida:")
+            for path in collisions:
+                console.print(f"  [yellow]•[/yellow] {path}")
+        if failures:
+            print_warning(f"{len(failures)} imagen(es) no se pudieron convertir:")
+            for path, error in failures:
+                console.print(f"  [red]•[/red] {path}: [dim]{error}[/dim]")
 
     elif os.path.isfile(input_path):
         if convert_single_file(input_path, output_format):
             print_success("Imagen convertida.")
 
+def scan_images(root: str, exclude: Optional[str] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    """Recorre `root` recursivamente y devuelve (ruta relativa, stat) de cada imagen soportada."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print_warning(f"No se pudo leer '{current}': {e}")
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if exclude is None or os.path.abspath(entry.path) != exclude:
+                    stack.append(entry.path)
+            elif entry.is_file() and entry.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.relpath(entry.path, root), entry.stat()
+
+def fingerprint(path: str) -> str:
+    """Huella del contenido, para reconocer archivos tocados o copiados sin cambios."""
+    hasher = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def load_manifest(path: str, output_format: str) -> Dict[str, dict]:
+    """Entradas del manifiesto por ruta de salida relativa; vacío si no existe o es de otro formato."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print_warning(f"Manifiesto ilegible, se reconstruirá: {e}")
+        return {}
+    if data.get("format") != output_format.lower():
+        return {}
+    return data.get("files", {})
+
+def save_manifest(path: str, output_format: str, files: Dict[str, dict]) -> None:
+    """Escribe el manifiesto de forma atómica.
+
+    Con ensure_ascii, las rutas que no son UTF-8 válido (surrogates) se guardan escapadas y
+    json.load las devuelve idénticas en la siguiente ejecución."""
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"format": output_format.lower(), "files": files}, f, indent=1, sort_keys=True)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def is_up_to_date(record: Optional[dict], source: str, src_stat: os.stat_result, output: str,
+                  skip_mode: str) -> Tuple[bool, Optional[str]]:
+    """Decide si la salida ya corresponde a la imagen de origen.
+
+    Devuelve (al día, huella calculada o None). Con entrada en el manifiesto basta con que
+    coincidan tamaño y mtime del origen y de la salida; con `fingerprint`, un origen con mtime
+    distinto pero el mismo contenido también cuenta como al día. Sin entrada (primera vez con
+    manifiesto) se acepta una salida más nueva que el origen."""
+    try:
+        out_stat = os.stat(output)
+    except FileNotFoundError:
+        return False, None
+
+    if record is None:
+        return out_stat.st_mtime_ns >= src_stat.st_mtime_ns, None
+
+    output_intact = (record.get("output_size") == out_stat.st_size
+                     and record.get("output_mtime_ns") == out_stat.st_mtime_ns)
+    if not output_intact:
+        return False, None
+    if record.get("size") == src_stat.st_size and record.get("mtime_ns") == src_stat.st_mtime_ns:
+        return True, record.get("fingerprint")
+    if skip_mode == "fingerprint" and record.get("size") == src_stat.st_size and record.get("fingerprint"):
+        digest = fingerprint(source)
+        return digest == record["fingerprint"], digest
+    return False, None
+
+def manifest_entry(rel_source: str, src_stat: os.stat_result, output: str, digest: Optional[str],
+                   skip_mode: str, source: str) -> dict:
+    out_stat = os.stat(output)
+    if digest is None and skip_mode == "fingerprint":
+        digest = fingerprint(source)
+    return {
+        "source": rel_source, "size": src_stat.st_size, "mtime_ns": src_stat.st_mtime_ns,
+        "fingerprint": digest, "output_size": out_stat.st_size, "output_mtime_ns": out_stat.st_mtime_ns,
+    }
+
+def run_mirror_converter(input_dir: str, output_dir: str, output_format: str,
+                         workers: int = DEFAULT_CONVERT_WORKERS, skip_mode: str = "mtime") -> None:
+    """Convierte un árbol completo en `output_dir`, respetando las subcarpetas.
+
+    Solo se convierten las imágenes nuevas o modificadas desde la última ejecución; el resto se
+    reconoce con el manifiesto y se salta, así que repetir la conversión sobre una biblioteca
+    casi sin cambios solo cuesta recorrer las carpetas."""
+    if not os.path.isdir(input_dir):
+        print_error(f"El directorio '{input_dir}' no existe.")
+        return
+    if not check_format(output_format):
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    manifest = load_manifest(manifest_path, output_format)
+    extension = output_format.lower()
+
+    print_step(f"Comparando '{input_dir}' con '{output_dir}'...")
+    files: Dict[str, dict] = {}
+    pending: List[Tuple[str, str, str, os.stat_result, Optional[str]]] = []
+    claimed, collisions = set(), []
+    for rel_source, src_stat in scan_images(input_dir, exclude=os.path.abspath(output_dir)):
+        rel_output = f"{os.path.splitext(rel_source)[0]}.{extension}"
+        if rel_output in claimed:
+            collisions.append(rel_source)
+            continue
+        claimed.add(rel_output)
+
+        source = os.path.join(input_dir, rel_source)
+        output = os.path.join(output_dir, rel_output)
+        record = manifest.get(rel_output)
+        if record and record.get("source") != rel_source:
+            record = None
+        up_to_date, digest = is_up_to_date(record, source, src_stat, output, skip_mode)
+        if up_to_date:
+            files[rel_output] = manifest_entry(rel_source, src_stat, output, digest, skip_mode, source)
+        else:
+            pending.append((rel_output, rel_source, output, src_stat, digest))
+    skipped = len(files)
+
+    console.print(f"[dim]{skipped} imagen(es) al día, {len(pending)} por convertir[/dim]")
+    failures = []
+    try:
+        if pending:
+            sources = [os.path.join(input_dir, p[1]) for p in pending]
+            results = convert_batch(sources, output_format, workers, [p[2] for p in pending])
+            for (rel_output, rel_source, output, src_stat, digest), (source, _, error) in zip(pending, results):
+                if error:
+                    failures.append((source, error))
+                else:
+                    files[rel_output] = manifest_entry(rel_source, src_stat, output, digest, skip_mode, source)
+    finally:
+        save_manifest(manifest_path, output_format, files)
+
+    removed = len(set(manifest) - claimed)
+    print_success(f"Proceso completado. {len(pending) - len(failures)} convertidas, {skipped} sin cambios.")
+    if removed:
+        console.print(f"[dim]{removed} entrada(s) del manifiesto ya no tienen imagen de origen; "
+                      f"sus archivos de salida no se borraron.[/dim]")
+    if collisions:
+        print_warning(f"{len(collisions)} imagen(es) omitidas porque otra con el mismo nombre ya ocupa esa salida:")
+        for rel_source in collisions:
+            console.print(f"  [yellow]•[/yellow] {rel_source}")
+    if failures:
+        print_warning(f"{len(failures)} imagen(es) no se pudieron convertir:")
+        for path, error in failures:
+            console.print(f"  [red]•[/red] {path}: [dim]{error}[/dim]")
+
 def run_pdf_converter(input_path: str) -> None:
     """Convierte un documento (docx, odt, etc) a PDF usando LibreOffice headless."""
     import subprocess
@@ -110,9 +375,18 @@ def main():
     parser = argparse.ArgumentParser(description="Convierte una imagen o directorio a formato diferente.")
     parser.add_argument("input_path", help="Ruta al archivo o directorio de entrada.")
     parser.add_argument("output_format", help="Formato de salida deseado (ej. png, jpg, webp).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_CONVERT_WORKERS,
+                        help=f"Imágenes convertidas en paralelo al procesar una carpeta (default: {DEFAULT_CONVERT_WORKERS})")
+    parser.add_argument("--output-dir", help="Convertir la carpeta y sus subcarpetas en este directorio, saltando lo que ya esté al día")
+    parser.add_argument("--skip", choices=SKIP_MODES, default="mtime",
+                        help="Con --output-dir: comparar por tamaño y fecha (mtime, default) o además por contenido (fingerprint)")
     args = parser.parse_args()
 
-    run_image_converter(args.input_path, args.output_format)
+    if args.output_dir:
+        run_mirror_converter(args.input_path, args.output_dir, args.output_format, args.workers, args.skip)
+        return
+
+    run_image_converter(args.input_path, args.output_format, args.workers)
 
 if __name__ == "__main__":
     main()
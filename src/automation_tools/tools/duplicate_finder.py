@@ -1,49 +1,429 @@
 import os
+import csv
+import json
+import heapq
+import math
+import mmap
+import errno
+import time
+import sqlite3
 import hashlib
+import shutil
 import argparse
-from typing import Dict, List, Optional
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from collections import defaultdict
+from itertools import islice
 
 import questionary
+from rich.progress import (Progress, TextColumn, BarColumn, DownloadColumn, MofNCompleteColumn,
+                           TransferSpeedColumn, TimeRemainingColumn)
 
 from automation_tools.core.logger import console, print_error, print_step, print_success, print_warning
+from automation_tools.core.config import get_project_root
 
-def hash_file(filepath: str, chunk_size: int = 8192) -> Optional[str]:
-    """Calcula el hash MD5 de un archivo."""
-    hasher = hashlib.md5()
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    from PIL import Image
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+# Bytes del inicio y del final que se leen en el hash parcial
+PARTIAL_HASH_SIZE = 4096
+
+# Algoritmos disponibles; xxHash (no criptográfico, el más rápido) solo si está instalado
+HASH_ALGORITHMS   = ["md5", "sha1", "sha256", "blake2b", "blake2s"] + (["xxh64", "xxh3_128"] if HAS_XXHASH else [])
+DEFAULT_ALGORITHM = "md5"
+# hashlib libera el GIL al procesar bloques grandes, así que los hilos escalan con el disco
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+# Lectura de archivos completos: el buffer crece con el archivo, entre estos límites
+MIN_READ_BUFFER = 64 * 1024
+MAX_READ_BUFFER = 4 * 1024 * 1024
+# Con --read-mode mmap, los archivos desde este tamaño se mapean en memoria
+MMAP_MIN_SIZE   = 64 * 1024 * 1024
+READ_MODES      = ["readinto", "mmap"]
+
+# Reemplazo de copias por enlaces
+LINK_MODES = ["hardlink", "reflink"]
+FICLONE    = 0x40049409  # ioctl de Linux para clonar un archivo (btrfs, XFS, bcachefs)
+
+# Imágenes casi duplicadas (hashes perceptuales de 64 bits)
+PERCEPTUAL_METHODS       = ["dhash", "phash"]
+DEFAULT_SIMILAR_DISTANCE = 8   # bits distintos (de 64) para considerar dos imágenes iguales
+IMAGE_EXTENSIONS         = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tif', '.tiff')
+PHASH_SIZE               = 32  # la imagen se reduce a 32x32 y se conservan las 8x8 frecuencias más bajas
+# Tabla de cosenos de la DCT-II, solo para las 8 frecuencias que se usan
+DCT_COS = [[math.cos(math.pi * (2 * n + 1) * k / (2 * PHASH_SIZE)) for n in range(PHASH_SIZE)] for k in range(8)]
+
+# Modo de memoria acotada (--output): registros que se ordenan en memoria antes de volcarlos
+# a disco, y archivos que se envían juntos al pool de hashes
+EXTERNAL_SORT_CHUNK = 200_000
+STREAM_BATCH        = 4096
+
+# Caché persistente de hashes entre escaneos
+HASH_CACHE_FILE         = os.path.join(get_project_root(), "hash_cache.db")
+HASH_CACHE_MAX_AGE_DAYS = 30   # entradas no vistas en este tiempo se eliminan
+
+# (ruta, tamaño, algoritmo, solo extremos, modo de lectura)
+HashJob = Tuple[str, int, str, bool, str]
+
+class FileEntry(NamedTuple):
+    """Datos de un archivo tomados una sola vez durante el recorrido."""
+    path: str
+    size: int
+    ctime: float
+    mtime_ns: int
+    dev: int
+    inode: int
+
+def new_hasher(algorithm: str):
+    if algorithm.startswith("xxh"):
+        if not HAS_XXHASH:
+            raise ValueError(f"El algoritmo {algorithm} requiere el paquete xxhash (pip install xxhash)")
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+_buffers = threading.local()
+
+def read_buffer(size: int) -> memoryview:
+    """Buffer del hilo actual, reutilizado entre archivos y ampliado solo cuando hace falta."""
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = _buffers.buffer = bytearray(size)
+    return memoryview(buffer)[:size]
+
+def buffer_size_for(file_size: int) -> int:
+    """Un archivo pequeño se lee en una sola llamada; uno grande en bloques de MAX_READ_BUFFER."""
+    return min(MAX_READ_BUFFER, max(MIN_READ_BUFFER, file_size + 1))
+
+def hash_file(filepath: str, chunk_size: Optional[int] = None, algorithm: str = DEFAULT_ALGORITHM,
+              read_mode: str = "readinto") -> Optional[str]:
+    """Calcula el hash de un archivo (MD5 por defecto).
+
+    Lee con readinto sobre un buffer reutilizado cuyo tamaño depende del archivo, o mapea el
+    archivo en memoria si `read_mode` es "mmap" y el archivo es grande."""
+    hasher = new_hasher(algorithm)
+    try:
+        with open(filepath, 'rb', buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            if read_mode == "mmap" and size >= MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+                return hasher.hexdigest()
+            view = read_buffer(chunk_size or buffer_size_for(size))
+            while True:
+                read = f.readinto(view)
+                if not read:
+                    break
+                hasher.update(view[:read])
+        return hasher.hexdigest()
+    except Exception as e:
+        print_error(f"Error al leer {filepath}: {e}")
+        return None
+
+def hash_partial(filepath: str, size: int, chunk_size: int = PARTIAL_HASH_SIZE,
+                 algorithm: str = DEFAULT_ALGORITHM) -> Optional[str]:
+    """Hash de los primeros y últimos `chunk_size` bytes de un archivo.
+
+    Si el archivo cabe entero en esas dos ventanas, el resultado es igual al de hash_file."""
+    if size <= 2 * chunk_size:
+        return hash_file(filepath, algorithm=algorithm)
+    hasher = new_hasher(algorithm)
     try:
         with open(filepath, 'rb') as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                hasher.update(chunk)
+            hasher.update(f.read(chunk_size))
+            f.seek(-chunk_size, os.SEEK_END)
+            hasher.update(f.read(chunk_size))
         return hasher.hexdigest()
     except Exception as e:
         print_error(f"Error al leer {filepath}: {e}")
         return None
 
-def find_duplicates(directory: str) -> Dict[str, List[str]]:
-    """Encuentra archivos duplicados en un directorio recursivamente."""
+class HashCache:
+    """Hashes parciales y completos ya calculados, guardados en SQLite.
+
+    Cada entrada se identifica por (dispositivo, inodo, algoritmo) y solo es válida mientras el
+    tamaño y el mtime del archivo sigan siendo los mismos. La ruta se guarda en bytes
+    (os.fsencode) para admitir nombres que no son UTF-8 válido."""
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str = HASH_CACHE_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+            # Versión anterior con la ruta como TEXT: es solo una caché, se reconstruye
+            self.conn.execute("DROP TABLE IF EXISTS hashes")
+            self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                dev       INTEGER NOT NULL,
+                inode     INTEGER NOT NULL,
+                algorithm TEXT    NOT NULL,
+                size      INTEGER NOT NULL,
+                mtime_ns  INTEGER NOT NULL,
+                path      BLOB    NOT NULL,
+                partial   TEXT,
+                full      TEXT,
+                seen      REAL    NOT NULL,
+                PRIMARY KEY (dev, inode, algorithm)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_hashes_path ON hashes (path)")
+        self.started = time.time()
+        self.hits    = 0
+
+    def lookup(self, entry: FileEntry, algorithm: str) -> Tuple[Optional[str], Optional[str]]:
+        """(parcial, completo) guardados para el archivo, o (None, None) si cambió o no está."""
+        row = self.conn.execute(
+            "SELECT partial, full FROM hashes WHERE dev = ? AND inode = ? AND algorithm = ? AND size = ? AND mtime_ns = ?",
+            (entry.dev, entry.inode, algorithm, entry.size, entry.mtime_ns)
+        ).fetchone()
+        if row is None:
+            return None, None
+        self.hits += (row[0] is not None) + (row[1] is not None)
+        return row[0], row[1]
+
+    def save(self, entries: List[Tuple[FileEntry, Optional[str], Optional[str]]], algorithm: str) -> None:
+        """Guarda (archivo, parcial, completo) y marca las entradas como vistas en este escaneo."""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO hashes (dev, inode, algorithm, size, mtime_ns, path, partial, full, seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(e.dev, e.inode, algorithm, e.size, e.mtime_ns, os.fsencode(os.path.abspath(e.path)), partial, full, now)
+                 for e, partial, full in entries if e.inode]
+            )
+
+    def evict(self, directory: str, algorithm: str) -> int:
+        """Borra las entradas de `directory` que no se vieron en este escaneo y las muy antiguas."""
+        prefix = os.fsencode(os.path.join(os.path.abspath(directory), ""))
+        with self.conn:
+            removed = self.conn.execute(
+                "DELETE FROM hashes WHERE seen < ? AND ((algorithm = ? AND substr(path, 1, ?) = ?) OR seen < ?)",
+                (self.started, algorithm, len(prefix), prefix, self.started - HASH_CACHE_MAX_AGE_DAYS * 86400)
+            ).rowcount
+        return removed
+
+    def close(self) -> None:
+        self.conn.close()
+
+def run_hash_job(job: HashJob) -> Optional[str]:
+    path, size, algorithm, partial, read_mode = job
+    if partial:
+        return hash_partial(path, size, algorithm=algorithm)
+    return hash_file(path, algorithm=algorithm, read_mode=read_mode)
+
+def job_bytes(job: HashJob) -> int:
+    _, size, _, partial, _ = job
+    return min(size, 2 * PARTIAL_HASH_SIZE) if partial else size
+
+def hash_in_pool(jobs: List[HashJob], description: str, workers: int = DEFAULT_HASH_WORKERS,
+                 use_processes: bool = False) -> Iterator[Tuple[HashJob, Optional[str]]]:
+    """Calcula los hashes en un pool de hilos (o procesos) mostrando el avance en MB/s."""
+    if not jobs:
+        return
+    columns = (TextColumn("[cyan]{task.description}"), BarColumn(), DownloadColumn(),
+               TransferSpeedColumn(), TimeRemainingColumn())
+    with Progress(*columns, console=console) as progress:
+        task = progress.add_task(description, total=sum(job_bytes(job) for job in jobs))
+        if workers <= 1:
+            results = map(run_hash_job, jobs)
+            for job, digest in zip(jobs, results):
+                progress.advance(task, job_bytes(job))
+                yield job, digest
+            return
+        executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor(max_workers=workers) as pool:
+            # En procesos se envían lotes para no pagar un viaje entre procesos por archivo
+            chunksize = max(1, min(256, len(jobs) // (workers * 4))) if use_processes else 1
+            for job, digest in zip(jobs, pool.map(run_hash_job, jobs, chunksize=chunksize)):
+                progress.advance(task, job_bytes(job))
+                yield job, digest
+
+def scan_tree(directory: str) -> Iterator[FileEntry]:
+    """Recorre el árbol con os.scandir y hace un solo stat por archivo (sin seguir enlaces)."""
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_symlink():
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            yield FileEntry(entry.path, st.st_size, st.st_ctime, st.st_mtime_ns,
+                                            st.st_dev, st.st_ino or entry.inode())
+                    except OSError as e:
+                        print_error(f"Error al leer {entry.path}: {e}")
+        except OSError as e:
+            print_error(f"Error al leer {current}: {e}")
+
+def find_duplicates(directory: str, algorithm: str = DEFAULT_ALGORITHM, workers: int = DEFAULT_HASH_WORKERS,
+                    use_processes: bool = False, cache: Optional[HashCache] = None,
+                    read_mode: str = "readinto") -> Dict[str, List[FileEntry]]:
+    """Encuentra archivos duplicados en un directorio recursivamente.
+
+    Se compara por etapas: tamaño, luego hash de los extremos del archivo y solo al final
+    hash completo de los que siguen coincidiendo. Con `cache`, solo se leen los archivos
+    nuevos o modificados desde el escaneo anterior."""
     print_step(f"Buscando duplicados en: [bold]{directory}[/bold]...")
+    new_hasher(algorithm)  # falla antes de recorrer el árbol si el algoritmo no existe
+    sizes = defaultdict(list)
+    for entry in scan_tree(directory):
+        sizes[entry.size].append(entry)
+
+    scanned = sum(len(entries) for entries in sizes.values())
+    # Hashes conocidos por archivo: [parcial, completo]
+    known: Dict[FileEntry, List[Optional[str]]] = {}
+    pending: List[FileEntry] = []
+    for entries in sizes.values():
+        if len(entries) < 2:
+            continue
+        for entry in entries:
+            known[entry] = list(cache.lookup(entry, algorithm)) if cache else [None, None]
+            if known[entry][0] is None:
+                pending.append(entry)
+
+    jobs = [(e.path, e.size, algorithm, True, read_mode) for e in pending]
+    for entry, (_, digest) in zip(pending, hash_in_pool(jobs, "Hash parcial", workers, use_processes)):
+        known[entry][0] = digest
+    partials = defaultdict(list)
+    for entry, (partial, _) in known.items():
+        if partial:
+            partials[(entry.size, partial)].append(entry)
+    candidates = {key: entries for key, entries in partials.items() if len(entries) > 1}
+
     hashes = defaultdict(list)
-    
-    for root, _, files in os.walk(directory):
-        for filename in files:
-            filepath = os.path.join(root, filename)
-            if os.path.islink(filepath):
+    pending = []
+    for (size, digest), entries in candidates.items():
+        if size <= 2 * PARTIAL_HASH_SIZE:
+            # El hash parcial ya cubrió el archivo completo
+            hashes[digest].extend(entries)
+            continue
+        for entry in entries:
+            if known[entry][1]:
+                hashes[known[entry][1]].append(entry)
+            else:
+                pending.append(entry)
+    jobs = [(e.path, e.size, algorithm, False, read_mode) for e in pending]
+    for entry, (_, digest) in zip(pending, hash_in_pool(jobs, "Hash completo", workers, use_processes)):
+        if digest:
+            known[entry][1] = digest
+            hashes[digest].append(entry)
+
+    console.print(
+        f"[dim]{scanned} archivo(s): {len(known)} con tamaño repetido, "
+        f"{sum(len(e) for e in candidates.values())} tras el hash parcial[/dim]"
+    )
+    if cache:
+        cache.save([(entry, partial, full) for entry, (partial, full) in known.items()], algorithm)
+        evicted = cache.evict(directory, algorithm)
+        console.print(f"[dim]Caché de hashes: {cache.hits} reutilizado(s), {evicted} entrada(s) obsoleta(s) eliminadas[/dim]")
+    return {h: entries for h, entries in hashes.items() if len(entries) > 1}
+
+def same_content(path_a: str, path_b: str, chunk_size: int = 1024 * 1024) -> bool:
+    """Compara dos archivos byte a byte."""
+    with open(path_a, 'rb') as a, open(path_b, 'rb') as b:
+        while True:
+            chunk_a, chunk_b = a.read(chunk_size), b.read(chunk_size)
+            if chunk_a != chunk_b:
+                return False
+            if not chunk_a:
+                return True
+
+def reflink(source: str, target: str) -> None:
+    """Crea `target` como clon copy-on-write de `source` (comparten bloques en disco)."""
+    if not HAS_FCNTL:
+        raise OSError("los reflinks no están disponibles en este sistema")
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), getattr(fcntl, "FICLONE", FICLONE), src.fileno())
+        except OSError as e:
+            if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL):
+                raise OSError(e.errno, "el sistema de archivos no admite reflinks entre estas rutas") from e
+            raise
+
+def replace_with_link(original: FileEntry, copy: FileEntry, mode: str) -> None:
+    """Reemplaza `copy` por un enlace a `original` sin dejar nunca la ruta vacía.
+
+    El enlace se crea con un nombre temporal en la misma carpeta y luego se renombra
+    encima de la copia (os.replace es atómico dentro de un mismo sistema de archivos)."""
+    if not same_content(original.path, copy.path):
+        raise OSError("el contenido ya no coincide con el original")
+    folder, name = os.path.split(copy.path)
+    temp = os.path.join(folder, f".{name}.{os.getpid()}.dedupe")
+    try:
+        if mode == "hardlink":
+            os.link(original.path, temp)
+        else:
+            reflink(original.path, temp)
+            shutil.copystat(copy.path, temp)
+        os.replace(temp, copy.path)
+    except BaseException:
+        if os.path.lexists(temp):
+            os.remove(temp)
+        raise
+
+def link_duplicates(duplicates: Dict[str, List[FileEntry]], mode: str) -> None:
+    """Reemplaza cada copia por un hardlink o reflink al original de su grupo."""
+    linked = 0
+    for entries in duplicates.values():
+        original = entries[0]
+        for copy in entries[1:]:
+            if (copy.dev, copy.inode) == (original.dev, original.inode):
+                continue  # ya es un hardlink del original
+            if mode == "hardlink" and copy.dev != original.dev:
+                print_warning(f"Omitido (otro sistema de archivos): {copy.path}")
                 continue
-            
-            file_hash = hash_file(filepath)
-            if file_hash:
-                hashes[file_hash].append(filepath)
-                
-    return {h: paths for h, paths in hashes.items() if len(paths) > 1}
-
-def run_duplicate_finder(directory: str, auto_delete: bool = False) -> None:
-    """Core function to find and optionally delete duplicates."""
+            try:
+                replace_with_link(original, copy, mode)
+                linked += 1
+                console.print(f"[dim]Enlazado: {copy.path} → {original.path}[/dim]")
+            except Exception as e:
+                print_error(f"Error al enlazar {copy.path}: {e}")
+
+    print_success(f"¡Proceso completado! Se reemplazaron {linked} copias por {mode}s.")
+
+def run_duplicate_finder(directory: str, auto_delete: bool = False, algorithm: str = DEFAULT_ALGORITHM,
+                         workers: int = DEFAULT_HASH_WORKERS, use_processes: bool = False,
+                         cache_path: Optional[str] = HASH_CACHE_FILE, read_mode: str = "readinto",
+                         link_mode: Optional[str] = None, auto_confirm: bool = False) -> None:
+    """Core function to find and optionally delete duplicates.
+
+    Con `link_mode` ("hardlink" o "reflink") las copias se reemplazan por enlaces al
+    original en lugar de eliminarse."""
     if not os.path.isdir(directory):
         print_error(f"El directorio '{directory}' no existe.")
         return
 
-    duplicates = find_duplicates(directory)
+    cache = HashCache(cache_path) if cache_path else None
+    try:
+        duplicates = find_duplicates(directory, algorithm, workers, use_processes, cache, read_mode)
+    finally:
+        if cache:
+            cache.close()
 
     if not duplicates:
         print_success("No se encontraron archivos duplicados.")
@@ -52,46 +432,496 @@ def run_duplicate_finder(directory: str, auto_delete: bool = False) -> None:
     total_wasted_bytes = 0
     console.print(f"\n[bold yellow]¡Se encontraron {len(duplicates)} grupos de duplicados![/bold yellow]\n")
 
-    for h, paths in duplicates.items():
-        paths.sort(key=lambda x: os.path.getctime(x))
+    for h, entries in duplicates.items():
+        entries.sort(key=lambda e: e.ctime)
         
         console.print(f"[cyan]Grupo Hash: {h[:8]}...[/cyan]")
-        console.print(f"  [green](Original)[/green] {paths[0]}")
+        console.print(f"  [green](Original)[/green] {entries[0].path}")
         
-        file_size = os.path.getsize(paths[0])
-        total_wasted_bytes += file_size * (len(paths) - 1)
+        # Las copias que ya son hardlinks del original no ocupan espacio extra
+        total_wasted_bytes += entries[0].size * sum(
+            1 for e in entries[1:] if (e.dev, e.inode) != (entries[0].dev, entries[0].inode)
+        )
         
-        for p in paths[1:]:
-            console.print(f"  [red](Copia)[/red]    {p}")
+        for e in entries[1:]:
+            console.print(f"  [red](Copia)[/red]    {e.path}")
         print()
 
     mb_saved = total_wasted_bytes / (1024 * 1024)
     console.print(f"Espacio recuperable: [bold green]{mb_saved:.2f} MB[/bold green]\n")
 
-    confirm = True if auto_delete else questionary.confirm("¿Deseas eliminar todas las copias (manteniendo el original de cada grupo)?").ask()
+    if link_mode:
+        confirm = True if auto_confirm else questionary.confirm(
+            f"¿Deseas reemplazar todas las copias por {link_mode}s al original de cada grupo?"
+        ).ask()
+        if confirm:
+            link_duplicates(duplicates, link_mode)
+        else:
+            print_warning("No se modificó ningún archivo.")
+        return
+
+    confirm = True if auto_delete or auto_confirm else questionary.confirm("¿Deseas eliminar todas las copias (manteniendo el original de cada grupo)?").ask()
 
     if confirm:
         deleted = 0
-        for h, paths in duplicates.items():
-            for p in paths[1:]: 
+        for h, entries in duplicates.items():
+            for copy in entries[1:]:
                 try:
-                    os.remove(p)
+                    os.remove(copy.path)
                     deleted += 1
-                    console.print(f"[dim]Eliminado: {p}[/dim]")
+                    console.print(f"[dim]Eliminado: {copy.path}[/dim]")
                 except Exception as e:
-                    print_error(f"Error al eliminar {p}: {e}")
+                    print_error(f"Error al eliminar {copy.path}: {e}")
         
         print_success(f"¡Proceso completado! Se eliminaron {deleted} archivos.")
     else:
         print_warning("No se eliminó ningún archivo.")
 
+# ─── Modo de memoria acotada ───
+
+class ExternalSorter:
+    """Ordena más registros de los que caben en memoria.
+
+    Los registros se acumulan en tandas de `chunk_size`; cada tanda se ordena y se vuelca a
+    un archivo temporal (una línea JSON por registro). Al recorrer el resultado, heapq.merge
+    mezcla todos los archivos leyendo una línea de cada uno a la vez."""
+
+    def __init__(self, directory: str, key: Callable[[List[Any]], Any], chunk_size: int = EXTERNAL_SORT_CHUNK):
+        self.directory  = directory
+        self.key        = key
+        self.chunk_size = chunk_size
+        self.count      = 0
+        self._buffer: List[List[Any]] = []
+        self._runs: List[str] = []
+
+    def add(self, record: List[Any]) -> None:
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.chunk_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._buffer.sort(key=self.key)
+        fd, path = tempfile.mkstemp(suffix=".run", dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for record in self._buffer:
+                # ensure_ascii escapa también los surrogates de nombres que no son UTF-8
+                f.write(json.dumps(record) + "\n")
+        self._runs.append(path)
+        self._buffer = []
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        if not self._runs:
+            # Todo cupo en memoria: no hace falta tocar el disco
+            self._buffer.sort(key=self.key)
+            yield from self._buffer
+            self._buffer = []
+            return
+        if self._buffer:
+            self._spill()
+        files = [open(path, "r", encoding="utf-8") for path in self._runs]
+        try:
+            yield from heapq.merge(*((json.loads(line) for line in f) for f in files), key=self.key)
+        finally:
+            for f, path in zip(files, self._runs):
+                f.close()
+                os.remove(path)
+            self._runs = []
+
+def repeated(records: Iterator[List[Any]], key: Callable[[List[Any]], Any]) -> Iterator[List[Any]]:
+    """De una secuencia ordenada por `key`, deja pasar solo los registros cuya clave se repite.
+
+    Solo guarda el primer registro de la racha actual, así que la memoria no crece."""
+    first, first_key, emitted = None, None, False
+    for record in records:
+        current = key(record)
+        if first is not None and current == first_key:
+            if not emitted:
+                yield first
+                emitted = True
+            yield record
+        else:
+            first, first_key, emitted = record, current, False
+
+def hash_stream(entries: Iterator[FileEntry], partial: bool, algorithm: str, read_mode: str, pool,
+                progress: Progress, task) -> Iterator[Tuple[FileEntry, Optional[str]]]:
+    """Calcula hashes de una secuencia de archivos por lotes, sin materializarla completa."""
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, STREAM_BATCH))
+        if not batch:
+            return
+        jobs = [(e.path, e.size, algorithm, partial, read_mode) for e in batch]
+        results = pool.map(run_hash_job, jobs, chunksize=64) if pool else map(run_hash_job, jobs)
+        for entry, job, digest in zip(batch, jobs, results):
+            progress.advance(task, job_bytes(job))
+            yield entry, digest
+
+class GroupWriter:
+    """Escribe los duplicados a medida que aparecen, en JSONL o CSV según la extensión.
+
+    Con errors="surrogateescape" los nombres que no son UTF-8 válido se escriben con sus bytes
+    originales, así la ruta del reporte sigue apuntando al archivo real."""
+
+    FIELDS = ["group", "hash", "size", "role", "path"]
+
+    def __init__(self, path: str):
+        self.path   = path
+        self.file   = open(path, "w", encoding="utf-8", errors="surrogateescape", newline="")
+        self.is_csv = path.lower().endswith(".csv")
+        self.groups = 0
+        self.copies = 0
+        self.wasted = 0
+        self._csv   = csv.writer(self.file) if self.is_csv else None
+        if self._csv:
+            self._csv.writerow(self.FIELDS)
+
+    def write(self, digest: str, entry: FileEntry, original: bool) -> None:
+        if original:
+            self.groups += 1
+        else:
+            self.copies += 1
+            self.wasted += entry.size
+        row = [self.groups, digest, entry.size, "original" if original else "copia", entry.path]
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self.file.write(json.dumps(dict(zip(self.FIELDS, row)), ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+def find_duplicates_streaming(directory: str, output: str, algorithm: str = DEFAULT_ALGORITHM,
+                              workers: int = DEFAULT_HASH_WORKERS, use_processes: bool = False,
+                              cache: Optional[HashCache] = None, read_mode: str = "readinto",
+                              temp_dir: Optional[str] = None) -> GroupWriter:
+    """Mismas etapas que find_duplicates, pero con memoria constante.
+
+    Cada etapa vuelca sus registros a un ExternalSorter y la siguiente los lee ordenados,
+    quedándose solo con las claves repetidas. Los grupos se escriben en `output` a medida
+    que se completan, con el archivo más antiguo de cada grupo como original."""
+    print_step(f"Buscando duplicados en: [bold]{directory}[/bold] (memoria acotada)...")
+    new_hasher(algorithm)
+    columns = (TextColumn("[cyan]{task.description}"), DownloadColumn(), TransferSpeedColumn())
+    executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+
+    with tempfile.TemporaryDirectory(prefix="duplicados-", dir=temp_dir) as tmp, \
+         executor(max_workers=max(1, workers)) as pool, Progress(*columns, console=console) as progress:
+        pool = pool if workers > 1 else None
+
+        # 1 — por tamaño: [path, size, ctime, mtime_ns, dev, inode]
+        by_size = ExternalSorter(tmp, key=lambda r: r[1])
+        for entry in scan_tree(directory):
+            by_size.add(list(entry))
+        scanned = by_size.count
+
+        # Hashes para la caché, guardados por lotes. Los aciertos también se guardan: así se
+        # marcan como vistos en este escaneo y evict() no los borra.
+        pending_cache: List[Tuple[FileEntry, Optional[str], Optional[str]]] = []
+
+        def remember(entry: FileEntry, partial: Optional[str], full: Optional[str]) -> None:
+            if not cache:
+                return
+            pending_cache.append((entry, partial, full))
+            if len(pending_cache) >= STREAM_BATCH:
+                cache.save(pending_cache, algorithm)
+                pending_cache.clear()
+
+        # 2 — por (tamaño, hash parcial): [size, parcial, completo en caché, *entry]
+        by_partial = ExternalSorter(tmp, key=lambda r: (r[0], r[1]))
+        known: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+        def candidates() -> Iterator[FileEntry]:
+            for record in repeated(iter(by_size), key=lambda r: r[1]):
+                entry = FileEntry(*record)
+                partial, full = cache.lookup(entry, algorithm) if cache else (None, None)
+                if partial:
+                    by_partial.add([entry.size, partial, full, *entry])
+                    remember(entry, partial, full)
+                else:
+                    known[entry.path] = (None, full)
+                    yield entry
+
+        task = progress.add_task("Hash parcial", total=None)
+        for entry, digest in hash_stream(candidates(), True, algorithm, read_mode, pool, progress, task):
+            full = known.pop(entry.path)[1]
+            if digest:
+                by_partial.add([entry.size, digest, full, *entry])
+                remember(entry, digest, full)
+        partial_candidates = by_partial.count
+
+        # 3 — por (hash completo, ctime): [completo, ctime, *entry]
+        by_full = ExternalSorter(tmp, key=lambda r: (r[0], r[1]))
+        partials: Dict[str, str] = {}
+
+        def needs_full() -> Iterator[FileEntry]:
+            for record in repeated(iter(by_partial), key=lambda r: (r[0], r[1])):
+                size, partial, full, entry = record[0], record[1], record[2], FileEntry(*record[3:])
+                if size <= 2 * PARTIAL_HASH_SIZE:
+                    full = partial  # el hash parcial ya cubrió el archivo completo
+                if full:
+                    by_full.add([full, entry.ctime, *entry])
+                else:
+                    partials[entry.path] = partial
+                    yield entry
+
+        task = progress.add_task("Hash completo", total=None)
+        for entry, digest in hash_stream(needs_full(), False, algorithm, read_mode, pool, progress, task):
+            partial = partials.pop(entry.path)
+            if digest:
+                by_full.add([digest, entry.ctime, *entry])
+                remember(entry, partial, digest)
+        if cache and pending_cache:
+            cache.save(pending_cache, algorithm)
+
+        # 4 — grupos: registros con el mismo hash completo, del más antiguo al más nuevo
+        writer = GroupWriter(output)
+        try:
+            previous = None
+            for record in repeated(iter(by_full), key=lambda r: r[0]):
+                writer.write(record[0], FileEntry(*record[2:]), original=record[0] != previous)
+                previous = record[0]
+        finally:
+            writer.close()
+
+    console.print(f"[dim]{scanned} archivo(s), {partial_candidates} tras comparar tamaños[/dim]")
+    if cache:
+        cache.evict(directory, algorithm)
+    return writer
+
+def run_streaming_finder(directory: str, output: str, algorithm: str = DEFAULT_ALGORITHM,
+                         workers: int = DEFAULT_HASH_WORKERS, use_processes: bool = False,
+                         cache_path: Optional[str] = HASH_CACHE_FILE, read_mode: str = "readinto",
+                         temp_dir: Optional[str] = None) -> None:
+    """Escanea árboles de cualquier tamaño y guarda los duplicados en un JSONL o CSV."""
+    if not os.path.isdir(directory):
+        print_error(f"El directorio '{directory}' no existe.")
+        return
+
+    cache = HashCache(cache_path) if cache_path else None
+    try:
+        writer = find_duplicates_streaming(directory, output, algorithm, workers, use_processes,
+                                           cache, read_mode, temp_dir)
+    finally:
+        if cache:
+            cache.close()
+
+    if not writer.groups:
+        print_success(f"No se encontraron archivos duplicados. Reporte vacío en {output}")
+        return
+    console.print(f"\n[bold yellow]{writer.groups} grupos de duplicados, {writer.copies} copias.[/bold yellow]")
+    console.print(f"Espacio recuperable: [bold green]{writer.wasted / (1024 * 1024):.2f} MB[/bold green]")
+    print_success(f"Reporte guardado en {output}")
+
+# ─── Imágenes casi duplicadas ───
+
+def load_gray(path: str, size: Tuple[int, int]) -> List[int]:
+    """Píxeles en escala de grises de la imagen reducida a `size`.
+
+    Con draft(), los JPEG se decodifican directamente a una escala reducida (1/2 a 1/8),
+    sin descomprimir la imagen completa."""
+    with Image.open(path) as img:
+        img.draft("L", (size[0] * 4, size[1] * 4))
+        small = img.convert("L").resize(size, Image.Resampling.BILINEAR)
+        return list(small.tobytes())
+
+def dhash(path: str) -> int:
+    """Hash de diferencias: cada bit indica si un píxel es más claro que su vecino derecho."""
+    pixels = load_gray(path, (9, 8))
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+def phash(path: str) -> int:
+    """Hash por DCT: cada bit indica si una de las 64 frecuencias bajas supera la mediana."""
+    pixels = load_gray(path, (PHASH_SIZE, PHASH_SIZE))
+    rows = [pixels[r * PHASH_SIZE:(r + 1) * PHASH_SIZE] for r in range(PHASH_SIZE)]
+    # DCT separable: primero por filas y luego por columnas, calculando solo 8 coeficientes
+    by_rows = [[sum(p * c for p, c in zip(row, DCT_COS[k])) for k in range(8)] for row in rows]
+    coeffs = [sum(by_rows[r][v] * DCT_COS[u][r] for r in range(PHASH_SIZE)) for u in range(8) for v in range(8)]
+    median = sorted(coeffs[1:])[31]  # sin el término constante, que solo refleja el brillo medio
+    value = 0
+    for coeff in coeffs:
+        value = (value << 1) | (coeff > median)
+    return value
+
+def perceptual_hash(job: Tuple[str, str]) -> Optional[int]:
+    path, method = job
+    try:
+        return dhash(path) if method == "dhash" else phash(path)
+    except Exception as e:
+        print_error(f"No se pudo leer la imagen {path}: {e}")
+        return None
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class MultiIndexHash:
+    """Índice de hashes de 64 bits para buscar vecinos por distancia de Hamming.
+
+    El hash se parte en 4 bloques de 16 bits, cada uno con su propia tabla. Si dos hashes
+    difieren en r bits o menos, al menos un bloque difiere en r // 4 bits o menos (principio
+    del palomar), así que basta con consultar en cada tabla las variantes del bloque con hasta
+    r // 4 bits cambiados, y solo se compara contra esa fracción de la colección."""
+
+    BLOCKS     = 4
+    BLOCK_BITS = 16
+
+    def __init__(self, values: List[int]):
+        mask = (1 << self.BLOCK_BITS) - 1
+        self.tables: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(self.BLOCKS)]
+        for value in values:
+            for block, table in enumerate(self.tables):
+                table[(value >> (block * self.BLOCK_BITS)) & mask].append(value)
+        self._flips: Dict[int, List[int]] = {}
+
+    def flips(self, bits: int) -> List[int]:
+        """Máscaras XOR de 16 bits con hasta `bits` bits encendidos."""
+        if bits not in self._flips:
+            masks = [0]
+            for _ in range(bits):
+                masks = list({m | (1 << i) for m in masks for i in range(self.BLOCK_BITS)} | set(masks))
+            self._flips[bits] = masks
+        return self._flips[bits]
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int]]:
+        """(hash, distancia) de todos los valores indexados a distancia <= radius."""
+        mask = (1 << self.BLOCK_BITS) - 1
+        candidates = set()
+        for block, table in enumerate(self.tables):
+            key = (value >> (block * self.BLOCK_BITS)) & mask
+            for flip in self.flips(radius // self.BLOCKS):
+                candidates.update(table.get(key ^ flip, ()))
+        return [(other, d) for other in candidates if (d := hamming(value, other)) <= radius]
+
+def find_similar_images(directory: str, method: str = "dhash", max_distance: int = DEFAULT_SIMILAR_DISTANCE,
+                        workers: int = DEFAULT_HASH_WORKERS, use_processes: bool = False,
+                        cache: Optional[HashCache] = None) -> List[List[Tuple[FileEntry, int]]]:
+    """Agrupa imágenes cuyo hash perceptual difiere en `max_distance` bits o menos.
+
+    Devuelve grupos de (archivo, hash) encabezados por la imagen más pesada; el resto del
+    grupo está a `max_distance` bits o menos de ella."""
+    print_step(f"Buscando imágenes similares en: [bold]{directory}[/bold]...")
+    images = [e for e in scan_tree(directory) if e.path.lower().endswith(IMAGE_EXTENSIONS)]
+    hashes: Dict[FileEntry, int] = {}
+    pending = []
+    for entry in images:
+        cached = cache.lookup(entry, method)[1] if cache else None
+        if cached:
+            hashes[entry] = int(cached, 16)
+        else:
+            pending.append(entry)
+
+    if pending:
+        columns = (TextColumn("[cyan]{task.description}"), BarColumn(), MofNCompleteColumn(), TimeRemainingColumn())
+        executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with Progress(*columns, console=console) as progress, executor(max_workers=max(1, workers)) as pool:
+            task = progress.add_task(f"Hash {method}", total=len(pending))
+            chunksize = max(1, min(64, len(pending) // (workers * 4))) if use_processes else 1
+            jobs = [(entry.path, method) for entry in pending]
+            for entry, value in zip(pending, pool.map(perceptual_hash, jobs, chunksize=chunksize)):
+                progress.advance(task)
+                if value is not None:
+                    hashes[entry] = value
+
+    if cache:
+        cache.save([(entry, None, f"{value:016x}") for entry, value in hashes.items()], method)
+        cache.evict(directory, method)
+
+    by_hash: Dict[int, List[FileEntry]] = defaultdict(list)
+    for entry, value in hashes.items():
+        by_hash[value].append(entry)
+    index = MultiIndexHash(list(by_hash))
+
+    # Grupos alrededor de un centro: la imagen más pesada todavía sin grupo se queda con todas las
+    # libres a `max_distance` bits o menos de ella. Sin encadenar pares (A~B~C), cada miembro
+    # cumple el umbral respecto de la imagen que encabeza el grupo.
+    largest = {value: max(entry.size for entry in entries) for value, entries in by_hash.items()}
+    assigned = set()
+    groups = []
+    for center in sorted(by_hash, key=lambda value: -largest[value]):
+        if center in assigned:
+            continue
+        members = [other for other, _ in index.search(center, max_distance) if other not in assigned]
+        assigned.update(members)
+        group = [(entry, value) for value in members for entry in by_hash[value]]
+        if len(group) > 1:
+            groups.append(sorted(group, key=lambda item: (-item[0].size, hamming(center, item[1]))))
+    console.print(f"[dim]{len(images)} imagen(es) analizadas, {len(hashes)} con hash[/dim]")
+    return sorted(groups, key=lambda group: group[0][0].path)
+
+def run_similar_finder(directory: str, method: str = "dhash", max_distance: int = DEFAULT_SIMILAR_DISTANCE,
+                       workers: int = DEFAULT_HASH_WORKERS, use_processes: bool = False,
+                       cache_path: Optional[str] = HASH_CACHE_FILE) -> None:
+    """Lista grupos de imágenes casi iguales (recodificadas, redimensionadas o re-guardadas).
+
+    Solo informa: como no son copias exactas, no se elimina ni enlaza nada."""
+    if not HAS_PILLOW:
+        print_error("Pillow no está instalado. Ejecuta: pip install Pillow")
+        return
+    if not os.path.isdir(directory):
+        print_error(f"El directorio '{directory}' no existe.")
+        return
+
+    cache = HashCache(cache_path) if cache_path else None
+    try:
+        groups = find_similar_images(directory, method, max_distance, workers, use_processes, cache)
+    finally:
+        if cache:
+            cache.close()
+
+    if not groups:
+        print_success("No se encontraron imágenes similares.")
+        return
+
+    console.print(f"\n[bold yellow]¡Se encontraron {len(groups)} grupos de imágenes similares![/bold yellow]\n")
+    for number, group in enumerate(groups, start=1):
+        best, best_hash = group[0]
+        console.print(f"[cyan]Grupo {number}[/cyan]")
+        console.print(f"  [green](Mayor)[/green]   {best.path} [dim]({best.size / 1024:.0f} KB)[/dim]")
+        for entry, value in group[1:]:
+            console.print(f"  [yellow](Similar)[/yellow] {entry.path} [dim]({entry.size / 1024:.0f} KB, "
+                          f"distancia {hamming(best_hash, value)})[/dim]")
+        print()
+
 def main():
     parser = argparse.ArgumentParser(description="Detector de Archivos Duplicados")
     parser.add_argument("directory", help="Directorio a escanear")
     parser.add_argument("--delete", action="store_true", help="Eliminar duplicados automaticamente")
+    parser.add_argument("--link", choices=LINK_MODES,
+                        help="Reemplazar las copias por hardlinks o reflinks al original en lugar de eliminarlas")
+    parser.add_argument("--yes", action="store_true", help="Aplicar la acción elegida sin preguntar")
+    parser.add_argument("--similar", nargs="?", const="dhash", choices=PERCEPTUAL_METHODS,
+                        help="Buscar imágenes casi iguales con un hash perceptual (default: dhash)")
+    parser.add_argument("--distance", type=int, default=DEFAULT_SIMILAR_DISTANCE,
+                        help=f"Bits distintos (de 64) tolerados con --similar (default: {DEFAULT_SIMILAR_DISTANCE})")
+    parser.add_argument("--algorithm", choices=HASH_ALGORITHMS, default=DEFAULT_ALGORITHM,
+                        help=f"Algoritmo de hash (default: {DEFAULT_ALGORITHM})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_HASH_WORKERS,
+                        help=f"Archivos que se leen en paralelo (default: {DEFAULT_HASH_WORKERS})")
+    parser.add_argument("--processes", action="store_true", help="Usar procesos en lugar de hilos para calcular los hashes")
+    parser.add_argument("--cache", default=HASH_CACHE_FILE, help="Archivo de la caché de hashes (default: hash_cache.db)")
+    parser.add_argument("--no-cache", action="store_true", help="No leer ni guardar la caché de hashes")
+    parser.add_argument("--read-mode", choices=READ_MODES, default="readinto",
+                        help="Lectura de archivos completos: readinto (default) o mmap para archivos grandes")
+    parser.add_argument("--output", help="Modo de memoria acotada: escribir los grupos en un .jsonl o .csv")
+    parser.add_argument("--temp-dir", help="Carpeta para los archivos temporales de --output (default: la del sistema)")
     args = parser.parse_args()
 
-    run_duplicate_finder(args.directory, args.delete)
+    if args.similar:
+        run_similar_finder(args.directory, args.similar, args.distance, args.workers, args.processes,
+                           None if args.no_cache else args.cache)
+        return
+
+    if args.output:
+        run_streaming_finder(args.directory, args.output, args.algorithm, args.workers, args.processes,
+                             None if args.no_cache else args.cache, args.read_mode, args.temp_dir)
+        return
+
+    run_duplicate_finder(args.directory, args.delete, args.algorithm, args.workers, args.processes,
+                         None if args.no_cache else args.cache, args.read_mode, args.link, args.yes)
 
 if __name__ == "__main__":
     main()
@@ -5,11 +5,24 @@ import sqlite3
 import os
 import re
 import argparse
-from datetime import datetime
-from typing import Optional, Dict, List, Any
+import threading
+import queue
+import heapq
+import socket
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Any, Iterator, Tuple
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from rich.table import Table
 
 from automation_tools.core.logger import setup_logger, console, print_error, print_success, print_warning, print_step
 from automation_tools.core.config import load_json_config, get_project_root
@@ -18,7 +31,49 @@ from automation_tools.core.config import load_json_config, get_project_root
 logger = setup_logger()
 
 # ─── Rutas ───
-DB_FILE = os.path.join(get_project_root(), "historial_precios.db")
+DB_FILE     = os.path.join(get_project_root(), "historial_precios.db")
+CONFIG_FILE = "productos_a_monitorear.json"
+CATALOG_TABLE = "productos"
+DB_JOURNAL_MODE = "WAL"   # usar "DELETE" si la base vive en una carpeta de red compartida
+
+# ─── Concurrencia por defecto ───
+DEFAULT_MAX_WORKERS          = 8
+DEFAULT_PER_HOST_CONCURRENCY = 2
+DEFAULT_REQUEST_DELAY        = (1.5, 4.0)
+DEFAULT_HTTP_POOL_SIZE       = 4
+DEFAULT_HTTP_RETRIES         = 2
+
+# ─── Circuit breaker por dominio ───
+DEFAULT_CIRCUIT_THRESHOLD   = 3     # fallos seguidos que abren el circuito
+DEFAULT_CIRCUIT_COOLDOWN    = 300   # segundos que se omite un host bloqueado
+RETRY_AFTER_MAX_WAIT        = 60    # un Retry-After mayor abre el circuito en lugar de esperar
+BLOCKING_STATUSES           = (403, 429, 503)
+
+# ─── API de MercadoLibre ───
+ML_API_URL         = "https://api.mercadolibre.com"
+ML_MULTIGET_CHUNK  = 20
+
+# ─── Programador adaptativo ───
+NEAR_TARGET_GAP    = 0.15   # a menos de 15% del objetivo el intervalo empieza a acortarse
+VOLATILITY_WEIGHT  = 20.0   # un coeficiente de variación de 5% reduce el intervalo a la mitad
+STABLE_BACKOFF     = 1.5    # factor de espaciado para productos sin cambios
+HISTORY_WINDOW     = 10     # lecturas recientes usadas para medir volatilidad
+CONFIG_POLL_SECONDS = 60
+
+# ─── Modo worker (cola compartida) ───
+DEFAULT_WORKER_BATCH      = 20
+DEFAULT_LEASE_SECONDS     = 300   # un worker caído libera sus productos pasado este tiempo
+LEASE_MAX_ATTEMPTS        = 3     # reclamos de un mismo producto antes de darlo por perdido en la ronda
+WORKER_IDLE_SECONDS       = 5
+WORK_QUEUE_RETENTION_DAYS = 2
+
+# ─── Límites de Telegram ───
+TELEGRAM_API_URL          = "https://api.telegram.org"
+TELEGRAM_CHAT_INTERVAL    = 1.0    # Telegram admite ~1 mensaje por segundo por chat
+TELEGRAM_GLOBAL_INTERVAL  = 1 / 30 # y ~30 mensajes por segundo en total por bot
+TELEGRAM_MAX_RETRIES      = 5
+TELEGRAM_MAX_LENGTH       = 4096
+NOTIFY_FLUSH_TIMEOUT      = 120
 
 # ─── User-Agents para rotación ───
 USER_AGENTS = [
@@ -31,10 +86,256 @@ USER_AGENTS = [
 
 # ─── Base de Datos — SQLite ───
 
+class PriceStore:
+    """Conexión SQLite única por proceso, en modo WAL, con escrituras agrupadas por ronda."""
+
+    PRAGMAS = (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=30000",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-8000",
+    )
+
+    def __init__(self, path: str, journal_mode: str = "WAL"):
+        self.path      = path
+        self.journal_mode = journal_mode
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock     = threading.RLock()
+        self._pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        self._batching = False
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                self._conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+                for pragma in self.PRAGMAS:
+                    self._conn.execute(pragma)
+            return self._conn
+
+    def query(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def write(self, sql: str, params: Tuple[Any, ...] = ()) -> None:
+        """Ejecuta una escritura; dentro de un lote queda pendiente hasta el flush."""
+        with self._lock:
+            if self._batching:
+                self._pending.append((sql, params))
+                return
+            with self.conn:
+                self.conn.execute(sql, params)
+
+    def executescript(self, script: str) -> None:
+        with self._lock:
+            self.conn.executescript(script)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Agrupa todas las escrituras del bloque en una sola transacción."""
+        with self._lock:
+            self._batching = True
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batching = False
+                self.flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transacción BEGIN IMMEDIATE: toma el lock de escritura antes de leer, así leer y
+        marcar filas es atómico también frente a otros procesos."""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            started = time.monotonic()
+            with self.conn:
+                for sql, params in pending:
+                    self.conn.execute(sql, params)
+            logger.info(f"Lote SQLite: {len(pending)} escritura(s) en {time.monotonic() - started:.3f}s")
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store: Optional[PriceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> PriceStore:
+    """Devuelve el almacén del proceso, reabriéndolo si DB_FILE o DB_JOURNAL_MODE cambiaron."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != DB_FILE or _store.journal_mode != DB_JOURNAL_MODE:
+            if _store is not None:
+                _store.close()
+            _store = PriceStore(DB_FILE, DB_JOURNAL_MODE)
+        return _store
+
+
+# Migraciones de esquema: la posición en la lista es la versión (PRAGMA user_version)
+MIGRATIONS = [
+    # 1 — índice (url, fecha) y tabla latest_price mantenida por trigger
+    """
+    CREATE INDEX IF NOT EXISTS idx_historial_url_fecha ON historial (url, fecha);
+
+    CREATE TABLE IF NOT EXISTS latest_price (
+        url         TEXT    PRIMARY KEY,
+        nombre      TEXT    NOT NULL,
+        precio      REAL    NOT NULL,
+        moneda      TEXT,
+        fecha       TEXT    NOT NULL
+    );
+
+    INSERT OR REPLACE INTO latest_price (url, nombre, precio, moneda, fecha)
+        SELECT url, nombre, precio, moneda, MAX(fecha) FROM historial GROUP BY url;
+
+    CREATE TRIGGER IF NOT EXISTS trg_historial_latest_price
+    AFTER INSERT ON historial
+    WHEN NOT EXISTS (SELECT 1 FROM latest_price WHERE url = NEW.url AND fecha > NEW.fecha)
+    BEGIN
+        INSERT OR REPLACE INTO latest_price (url, nombre, precio, moneda, fecha)
+        VALUES (NEW.url, NEW.nombre, NEW.precio, NEW.moneda, NEW.fecha);
+    END;
+    """,
+    # 2 — agregados por hora y por día (min/max/promedio/último) mantenidos por trigger
+    """
+    CREATE TABLE IF NOT EXISTS rollup_hourly (
+        url         TEXT    NOT NULL,
+        bucket      TEXT    NOT NULL,
+        nombre      TEXT    NOT NULL,
+        moneda      TEXT,
+        precio_min  REAL    NOT NULL,
+        precio_max  REAL    NOT NULL,
+        precio_sum  REAL    NOT NULL,
+        lecturas    INTEGER NOT NULL,
+        precio_last REAL    NOT NULL,
+        fecha_last  TEXT    NOT NULL,
+        PRIMARY KEY (url, bucket)
+    );
+
+    INSERT OR REPLACE INTO rollup_hourly
+        (url, bucket, nombre, moneda, precio_min, precio_max, precio_sum, lecturas, precio_last, fecha_last)
+        SELECT url, substr(fecha, 1, 13), nombre, moneda, MIN(precio), MAX(precio), SUM(precio), COUNT(*),
+               (SELECT h2.precio FROM historial h2
+                 WHERE h2.url = h.url AND substr(h2.fecha, 1, 13) = substr(h.fecha, 1, 13)
+                 ORDER BY h2.fecha DESC, h2.id DESC LIMIT 1),
+               MAX(fecha)
+        FROM historial h GROUP BY url, substr(fecha, 1, 13);
+
+    CREATE INDEX IF NOT EXISTS idx_rollup_hourly_bucket ON rollup_hourly (bucket);
+
+    CREATE TRIGGER IF NOT EXISTS trg_historial_rollup_hourly
+    AFTER INSERT ON historial
+    BEGIN
+        INSERT INTO rollup_hourly
+            (url, bucket, nombre, moneda, precio_min, precio_max, precio_sum, lecturas, precio_last, fecha_last)
+        VALUES (NEW.url, substr(NEW.fecha, 1, 13), NEW.nombre, NEW.moneda,
+                NEW.precio, NEW.precio, NEW.precio, 1, NEW.precio, NEW.fecha)
+        ON CONFLICT (url, bucket) DO UPDATE SET
+            nombre      = excluded.nombre,
+            precio_min  = MIN(precio_min, excluded.precio_min),
+            precio_max  = MAX(precio_max, excluded.precio_max),
+            precio_sum  = precio_sum + excluded.precio_sum,
+            lecturas    = lecturas + 1,
+            precio_last = CASE WHEN excluded.fecha_last >= fecha_last THEN excluded.precio_last ELSE precio_last END,
+            fecha_last  = MAX(fecha_last, excluded.fecha_last);
+    END;
+
+    CREATE TABLE IF NOT EXISTS rollup_daily (
+        url         TEXT    NOT NULL,
+        bucket      TEXT    NOT NULL,
+        nombre      TEXT    NOT NULL,
+        moneda      TEXT,
+        precio_min  REAL    NOT NULL,
+        precio_max  REAL    NOT NULL,
+        precio_sum  REAL    NOT NULL,
+        lecturas    INTEGER NOT NULL,
+        precio_last REAL    NOT NULL,
+        fecha_last  TEXT    NOT NULL,
+        PRIMARY KEY (url, bucket)
+    );
+
+    INSERT OR REPLACE INTO rollup_daily
+        (url, bucket, nombre, moneda, precio_min, precio_max, precio_sum, lecturas, precio_last, fecha_last)
+        SELECT url, substr(fecha, 1, 10), nombre, moneda, MIN(precio), MAX(precio), SUM(precio), COUNT(*),
+               (SELECT h2.precio FROM historial h2
+                 WHERE h2.url = h.url AND substr(h2.fecha, 1, 10) = substr(h.fecha, 1, 10)
+                 ORDER BY h2.fecha DESC, h2.id DESC LIMIT 1),
+               MAX(fecha)
+        FROM historial h GROUP BY url, substr(fecha, 1, 10);
+
+    CREATE INDEX IF NOT EXISTS idx_rollup_daily_bucket ON rollup_daily (bucket);
+
+    CREATE TRIGGER IF NOT EXISTS trg_historial_rollup_daily
+    AFTER INSERT ON historial
+    BEGIN
+        INSERT INTO rollup_daily
+            (url, bucket, nombre, moneda, precio_min, precio_max, precio_sum, lecturas, precio_last, fecha_last)
+        VALUES (NEW.url, substr(NEW.fecha, 1, 10), NEW.nombre, NEW.moneda,
+                NEW.precio, NEW.precio, NEW.precio, 1, NEW.precio, NEW.fecha)
+        ON CONFLICT (url, bucket) DO UPDATE SET
+            nombre      = excluded.nombre,
+            precio_min  = MIN(precio_min, excluded.precio_min),
+            precio_max  = MAX(precio_max, excluded.precio_max),
+            precio_sum  = precio_sum + excluded.precio_sum,
+            lecturas    = lecturas + 1,
+            precio_last = CASE WHEN excluded.fecha_last >= fecha_last THEN excluded.precio_last ELSE precio_last END,
+            fecha_last  = MAX(fecha_last, excluded.fecha_last);
+    END;
+    """,
+    # 3 — cola de trabajo compartida entre workers (un registro por producto y ronda)
+    """
+    CREATE TABLE IF NOT EXISTS work_queue (
+        round_id     TEXT    NOT NULL,
+        url          TEXT    NOT NULL,
+        orden        INTEGER NOT NULL,
+        producto     TEXT    NOT NULL,
+        lease_owner  TEXT,
+        lease_expira REAL,
+        intentos     INTEGER NOT NULL DEFAULT 0,
+        hecho        INTEGER NOT NULL DEFAULT 0,
+        precio       REAL,
+        worker       TEXT,
+        fecha        TEXT,
+        PRIMARY KEY (round_id, url)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_work_queue_pending ON work_queue (round_id, hecho, orden);
+    """,
+]
+
+
+def migrate_db(store: PriceStore) -> None:
+    """Aplica las migraciones pendientes según PRAGMA user_version."""
+    version = store.query("PRAGMA user_version")[0][0]
+    for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        store.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;")
+        logger.info(f"Migración de base de datos aplicada: v{number}")
+
+
 def init_db() -> None:
-    """Inicializa la base de datos y crea la tabla si no existe."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.execute("""
+    """Inicializa la base de datos, crea las tablas si no existen y aplica migraciones."""
+    store = get_store()
+    store.executescript("""
         CREATE TABLE IF NOT EXISTS historial (
             id          INTEGER PRIMARY KEY AUTOINCREMENT,
             nombre      TEXT    NOT NULL,
@@ -42,43 +343,59 @@ def init_db() -> None:
             precio      REAL    NOT NULL,
             moneda      TEXT,
             fecha       TEXT    NOT NULL
-        )
+        );
+        CREATE TABLE IF NOT EXISTS cache_http (
+            url           TEXT    PRIMARY KEY,
+            etag          TEXT,
+            last_modified TEXT,
+            precio        REAL    NOT NULL,
+            fecha         TEXT    NOT NULL
+        );
     """)
-    conn.commit()
-    conn.close()
+    migrate_db(store)
 
 
 def guardar_precio(nombre: str, url: str, precio: float, moneda: str) -> None:
     """Guarda una lectura de precio en el historial."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.execute(
+    get_store().write(
         "INSERT INTO historial (nombre, url, precio, moneda, fecha) VALUES (?, ?, ?, ?, ?)",
         (nombre, url, precio, moneda, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     )
-    conn.commit()
-    conn.close()
     logger.info(f"Precio guardado: {nombre} → {precio} {moneda}")
 
 
 def obtener_ultimo_precio(url: str) -> Optional[float]:
     """Devuelve el precio más reciente registrado para una URL."""
-    conn = sqlite3.connect(DB_FILE)
-    row = conn.execute(
-        "SELECT precio FROM historial WHERE url = ? ORDER BY fecha DESC LIMIT 1",
+    rows = get_store().query("SELECT precio FROM latest_price WHERE url = ?", (url,))
+    return rows[0][0] if rows else None
+
+
+def obtener_cache_http(url: str) -> Optional[Tuple[Optional[str], Optional[str], float]]:
+    """Devuelve (ETag, Last-Modified, precio) guardados de la última descarga de una URL."""
+    rows = get_store().query(
+        "SELECT etag, last_modified, precio FROM cache_http WHERE url = ?",
         (url,)
-    ).fetchone()
-    conn.close()
-    return row[0] if row else None
+    )
+    return rows[0] if rows else None
+
+
+def guardar_cache_http(url: str, etag: Optional[str], last_modified: Optional[str], precio: float) -> None:
+    """Guarda los validadores HTTP de una URL junto con el precio extraído."""
+    if etag or last_modified:
+        get_store().write(
+            "INSERT OR REPLACE INTO cache_http (url, etag, last_modified, precio, fecha) VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, precio, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        )
+    else:
+        get_store().write("DELETE FROM cache_http WHERE url = ?", (url,))
 
 
 def mostrar_historial() -> None:
     """Imprime el historial completo en consola."""
     init_db()
-    conn = sqlite3.connect(DB_FILE)
-    rows = conn.execute(
+    rows = get_store().query(
         "SELECT nombre, precio, moneda, fecha FROM historial ORDER BY fecha DESC LIMIT 50"
-    ).fetchall()
-    conn.close()
+    )
 
     if not rows:
         print_warning("No hay historial registrado aún.")
@@ -93,28 +410,83 @@ def mostrar_historial() -> None:
     console.print(f"[cyan]{'─'*60}[/cyan]\n")
 
 
-# ─── Notificaciones — Telegram ───
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
 
-def send_telegram(token: str, chat_id: str, message: str) -> None:
-    """Envía un mensaje por Telegram."""
-    if not token or not chat_id:
-        return
-    try:
-        url = f"https://api.telegram.org/bot{token}/sendMessage"
-        requests.post(url, json={"chat_id": chat_id, "text": message, "parse_mode": "HTML"}, timeout=10)
-        logger.info(f"Telegram enviado: {message[:60]}...")
-    except Exception as e:
-        logger.error(f"Error Telegram: {e}")
 
+def sparkline(values: List[float], width: int = 30) -> str:
+    """Gráfico de una línea con bloques Unicode, promediando si hay más puntos que ancho."""
+    if not values:
+        return ""
+    if len(values) > width:
+        step   = len(values) / width
+        values = [
+            sum(chunk) / len(chunk)
+            for chunk in (values[int(i * step):int((i + 1) * step)] for i in range(width))
+            if chunk
+        ]
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return "".join(SPARK_CHARS[int((v - low) / span * (len(SPARK_CHARS) - 1))] for v in values)
 
-def send_notification(title: str, message: str, settings: Dict[str, Any]) -> None:
-    """Notificación por Telegram + consola."""
-    full_msg = f"<b>{title}</b>\n{message}"
-    console.print(f"\n[bold yellow]🔔 {title}:[/bold yellow] {message}")
 
-    token   = settings.get("telegram_token", "")
-    chat_id = settings.get("telegram_chat_id", "")
-    send_telegram(token, chat_id, full_msg)
+def rollup_table(por_hora: bool) -> Tuple[str, str]:
+    """Tabla de agregados y formato de bucket para la granularidad pedida."""
+    if por_hora:
+        return "rollup_hourly", "%Y-%m-%d %H"
+    return "rollup_daily", "%Y-%m-%d"
+
+
+def mostrar_reporte(dias: int = 90, filtro: Optional[str] = None, por_hora: bool = False) -> None:
+    """Resumen por producto de los últimos días a partir de los agregados precalculados."""
+    init_db()
+    table_name, bucket_fmt = rollup_table(por_hora)
+    desde  = (datetime.now() - timedelta(days=dias)).strftime(bucket_fmt)
+    params: Tuple[Any, ...] = (desde,)
+    where  = "bucket >= ?"
+    if filtro:
+        where  += " AND (nombre LIKE ? OR url LIKE ?)"
+        params += (f"%{filtro}%", f"%{filtro}%")
+
+    rows = get_store().query(f"""
+        SELECT url, bucket, nombre, moneda, precio_min, precio_max, precio_sum, lecturas, precio_last
+        FROM {table_name} WHERE {where} ORDER BY url, bucket
+    """, params)
+
+    if not rows:
+        print_warning(f"No hay lecturas en los últimos {dias} día(s).")
+        return
+
+    productos: Dict[str, List[Tuple[Any, ...]]] = {}
+    for row in rows:
+        productos.setdefault(row[0], []).append(row)
+
+    table = Table(title=f"Precios — últimos {dias} día(s)", show_header=True,
+                  title_style="bold magenta", header_style="bold cyan")
+    table.add_column("Producto", style="blue")
+    table.add_column("Mínimo", justify="right", style="green", no_wrap=True)
+    table.add_column("Fecha mín.", style="dim", no_wrap=True)
+    table.add_column("Máximo", justify="right")
+    table.add_column("Promedio", justify="right")
+    table.add_column("Último", justify="right")
+    table.add_column("Tendencia", no_wrap=True)
+
+    for buckets in productos.values():
+        moneda   = buckets[-1][3] or ""
+        minimo   = min(buckets, key=lambda r: r[4])
+        maximo   = max(r[5] for r in buckets)
+        promedio = sum(r[6] for r in buckets) / sum(r[7] for r in buckets)
+        table.add_row(
+            buckets[-1][2],
+            f"{minimo[4]:,.2f} {moneda}",
+            minimo[1],
+            f"{maximo:,.2f}",
+            f"{promedio:,.2f}",
+            f"{buckets[-1][8]:,.2f}",
+            sparkline([r[8] for r in buckets]),
+        )
+
+    console.print(table)
+    console.print()
 
 
 # ─── Utilidades de Precio ───
@@ -149,21 +521,252 @@ def get_headers() -> Dict[str, str]:
     }
 
 
+def conditional_headers(cached: Optional[Tuple[Optional[str], Optional[str], float]]) -> Dict[str, str]:
+    """Headers If-None-Match / If-Modified-Since a partir de la caché de una URL."""
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def get_host(url: str) -> str:
+    """Devuelve el host (con puerto) de una URL, usado como clave de cortesía."""
+    return urlparse(url).netloc.lower()
+
+
+# ─── Sesiones HTTP ───
+
+class SessionPool:
+    """Mantiene una sesión keep-alive por host para reutilizar conexiones TCP/TLS."""
+
+    def __init__(self, pool_size: int = DEFAULT_HTTP_POOL_SIZE, retries: int = DEFAULT_HTTP_RETRIES):
+        self.pool_size = max(1, pool_size)
+        self.retries   = max(0, retries)
+        self._lock     = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        """Aplica los tamaños de pool y reintentos de la configuración, cerrando las sesiones previas.
+
+        El pool nunca es menor que per_host_concurrency: con más peticiones simultáneas que
+        conexiones, urllib3 descarta las sobrantes y se pierde el keep-alive."""
+        self.close()
+        per_host = int(settings.get("per_host_concurrency", DEFAULT_PER_HOST_CONCURRENCY))
+        self.pool_size = max(1, int(settings.get("http_pool_size", DEFAULT_HTTP_POOL_SIZE)), per_host)
+        self.retries   = max(0, int(settings.get("http_retries", DEFAULT_HTTP_RETRIES)))
+
+    def get(self, url: str) -> requests.Session:
+        """Devuelve la sesión del host de la URL, creándola la primera vez."""
+        host = get_host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._sessions[host] = self._build_session()
+        return session
+
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """Cierra todas las sesiones abiertas."""
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+
+# Pool compartido por todas las peticiones salientes del monitor
+# (el despachador de Telegram usa uno propio porque envía entre rondas)
+http_sessions = SessionPool()
+
+
+def http_get(url: str, **kwargs: Any) -> requests.Response:
+    return http_sessions.get(url).get(url, **kwargs)
+
+
+# ─── Notificaciones — Telegram ───
+
+def post_telegram(token: str, chat_id: str, message: str,
+                  sessions: Optional[SessionPool] = None) -> Tuple[bool, Optional[float]]:
+    """Envía un mensaje por Telegram. Devuelve (éxito, segundos a esperar si hubo límite)."""
+    url = f"{TELEGRAM_API_URL}/bot{token}/sendMessage"
+    r   = (sessions or http_sessions).get(url).post(
+        url, json={"chat_id": chat_id, "text": message, "parse_mode": "HTML"}, timeout=10
+    )
+    if r.status_code == 200:
+        return True, None
+    retry_after = None
+    if r.status_code == 429:
+        try:
+            retry_after = float(r.json().get("parameters", {}).get("retry_after", 1))
+        except ValueError:
+            retry_after = 1.0
+    elif r.status_code < 500:
+        raise ValueError(f"HTTP {r.status_code}: {r.text[:100]}")
+    return False, retry_after
+
+
+def split_message(text: str, limit: int = TELEGRAM_MAX_LENGTH) -> List[str]:
+    """Parte un mensaje largo en bloques que respetan el límite de Telegram."""
+    parts, current = [], ""
+    for block in text.split("\n\n"):
+        candidate = f"{current}\n\n{block}" if current else block
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            parts.append(current)
+        while len(block) > limit:
+            parts.append(block[:limit])
+            block = block[limit:]
+        current = block
+    if current:
+        parts.append(current)
+    return parts
+
+
+class NotificationDispatcher:
+    """Cola en segundo plano para Telegram, con límite por chat, reintentos y modo resumen."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[str, str, str]]" = queue.Queue()
+        self._lock      = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._sessions  = SessionPool(pool_size=1)
+        self._last_sent: Dict[str, float] = {}
+        self._last_any  = 0.0
+        self._digest: Optional[Dict[Tuple[str, str], List[str]]] = None
+
+    def submit(self, token: str, chat_id: str, message: str) -> None:
+        if not token or not chat_id:
+            return
+        with self._lock:
+            if self._digest is not None:
+                self._digest.setdefault((token, chat_id), []).append(message)
+                return
+        self._enqueue(token, chat_id, message)
+
+    def begin_round(self, settings: Dict[str, Any]) -> None:
+        """En modo resumen, acumula las alertas de la ronda en lugar de enviarlas."""
+        with self._lock:
+            self._digest = {} if settings.get("telegram_digest") else None
+
+    def end_round(self) -> None:
+        """Envía el resumen acumulado: un solo mensaje por chat con todas las alertas."""
+        with self._lock:
+            digest, self._digest = self._digest, None
+        for (token, chat_id), messages in (digest or {}).items():
+            if len(messages) == 1:
+                self._enqueue(token, chat_id, messages[0])
+                continue
+            text = f"<b>🔔 {len(messages)} alertas de precio</b>\n\n" + "\n\n".join(messages)
+            for part in split_message(text):
+                self._enqueue(token, chat_id, part)
+
+    def _enqueue(self, token: str, chat_id: str, message: str) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+                self._thread.start()
+        self._queue.put((token, chat_id, message))
+
+    def _wait_rate_limit(self, chat_id: str) -> None:
+        now  = time.monotonic()
+        wait = max(self._last_sent.get(chat_id, 0.0) + TELEGRAM_CHAT_INTERVAL,
+                   self._last_any + TELEGRAM_GLOBAL_INTERVAL) - now
+        if wait > 0:
+            time.sleep(wait)
+
+    def _deliver(self, token: str, chat_id: str, message: str) -> None:
+        for attempt in range(TELEGRAM_MAX_RETRIES):
+            self._wait_rate_limit(chat_id)
+            try:
+                sent, retry_after = post_telegram(token, chat_id, message, self._sessions)
+            except requests.RequestException as e:
+                sent, retry_after = False, None
+                logger.warning(f"Telegram: error de red ({e}), intento {attempt + 1}")
+            except Exception as e:
+                logger.error(f"Error Telegram: {e}")
+                return
+            finally:
+                self._last_sent[chat_id] = self._last_any = time.monotonic()
+
+            if sent:
+                logger.info(f"Telegram enviado: {message[:60]}...")
+                return
+            time.sleep(retry_after if retry_after is not None else min(60, 2 ** attempt))
+        logger.error(f"Telegram: mensaje descartado tras {TELEGRAM_MAX_RETRIES} intentos: {message[:60]}...")
+
+    def _run(self) -> None:
+        while True:
+            token, chat_id, message = self._queue.get()
+            try:
+                self._deliver(token, chat_id, message)
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que la cola se vacíe. Devuelve False si se agotó el tiempo."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+
+notifier = NotificationDispatcher()
+
+
+def send_notification(title: str, message: str, settings: Dict[str, Any]) -> None:
+    """Notificación por consola inmediata + Telegram en segundo plano."""
+    full_msg = f"<b>{title}</b>\n{message}"
+    console.print(f"\n[bold yellow]🔔 {title}:[/bold yellow] {message}")
+
+    token   = settings.get("telegram_token", "")
+    chat_id = settings.get("telegram_chat_id", "")
+    notifier.submit(token, chat_id, full_msg)
+
+
 # ─── Scrapers ───
 
-def check_mercadolibre_api(item_id: str, access_token: str) -> Optional[float]:
-    """Consulta el precio vía API oficial de MercadoLibre."""
-    try:
-        headers = {"Authorization": f"Bearer {access_token}"} if access_token else {}
-        url = f"https://api.mercadolibre.com/items/{item_id}"
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            price = data.get("price") or data.get("sale_price", {}).get("amount")
-            return float(price) if price else None
-    except Exception as e:
-        logger.warning(f"ML API falló para {item_id}: {e}")
-    return None
+def fetch_mercadolibre_prices(item_ids: List[str], access_token: str) -> Dict[str, float]:
+    """Consulta precios en lote vía el multiget de la API oficial (/items?ids=...)."""
+    headers = {"Authorization": f"Bearer {access_token}"} if access_token else {}
+    prices: Dict[str, float] = {}
+    for i in range(0, len(item_ids), ML_MULTIGET_CHUNK):
+        chunk = item_ids[i:i + ML_MULTIGET_CHUNK]
+        url   = f"{ML_API_URL}/items"
+        try:
+            r = http_get(url, headers=headers, timeout=10,
+                         params={"ids": ",".join(chunk), "attributes": "id,price,sale_price"})
+            if r.status_code != 200:
+                logger.warning(f"ML API multiget: HTTP {r.status_code} para {len(chunk)} item(s)")
+                continue
+            for entry in r.json():
+                body = entry.get("body") or {}
+                if entry.get("code") != 200 or not body.get("id"):
+                    continue
+                price = body.get("price") or (body.get("sale_price") or {}).get("amount")
+                if price:
+                    prices[body["id"]] = float(price)
+        except Exception as e:
+            logger.warning(f"ML API multiget falló para {len(chunk)} item(s): {e}")
+    return prices
 
 
 def extract_ml_item_id(url: str) -> Optional[str]:
@@ -172,43 +775,218 @@ def extract_ml_item_id(url: str) -> Optional[str]:
     return match.group(1).replace("-", "") if match else None
 
 
-def check_mercadolibre(url: str, soup: BeautifulSoup, settings: Dict[str, Any], access_token: str = "") -> Optional[float]:
-    item_id = extract_ml_item_id(url)
-    if item_id and access_token:
-        price = check_mercadolibre_api(item_id, access_token)
+# ─── Extracción Rápida ───
+
+JSONLD_RE         = re.compile(rb"<script[^>]*application/ld\+json[^>]*>(.*?)</script>", re.I | re.S)
+META_PRICE_RE     = re.compile(rb"<meta\b[^>]*(?:itemprop|property)=[\"'](?:price|product:price:amount)[\"'][^>]*>", re.I)
+META_CONTENT_RE   = re.compile(rb"\bcontent=[\"']([^\"']+)[\"']", re.I)
+
+extraction_stats  = Counter()
+_stats_lock       = threading.Lock()
+
+
+def record_extraction(strategy: str) -> None:
+    with _stats_lock:
+        extraction_stats[strategy] += 1
+
+
+def extraction_summary() -> str:
+    """Resumen de aciertos por estrategia, ej. 'jsonld=12, subtree=3'."""
+    with _stats_lock:
+        return ", ".join(f"{name}={count}" for name, count in extraction_stats.most_common())
+
+
+def parse_structured_price(value: Any, settings: Dict[str, Any]) -> Optional[float]:
+    """Los datos estructurados usan formato máquina (punto decimal); si no, se limpia según la configuración."""
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        price = clean_price(str(value), settings)
+    return price if price else None
+
+
+def find_jsonld_price(node: Any) -> Any:
+    """Busca recursivamente offers.price / offers.lowPrice en un bloque JSON-LD."""
+    if isinstance(node, list):
+        for item in node:
+            found = find_jsonld_price(item)
+            if found is not None:
+                return found
+    elif isinstance(node, dict):
+        offers = node.get("offers")
+        for offer in offers if isinstance(offers, list) else [offers]:
+            if isinstance(offer, dict):
+                price = offer.get("price", offer.get("lowPrice"))
+                if price is not None:
+                    return price
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                found = find_jsonld_price(value)
+                if found is not None:
+                    return found
+    return None
+
+
+def extract_jsonld(url: str, content: bytes, settings: Dict[str, Any]) -> Optional[float]:
+    for block in JSONLD_RE.findall(content):
+        try:
+            data = json.loads(block.decode("utf-8", errors="replace"))
+        except ValueError:
+            continue
+        price = parse_structured_price(find_jsonld_price(data), settings)
         if price:
-            logger.info(f"ML precio via API: {price}")
             return price
+    return None
+
 
-    selectors = [
-        ("meta", {"itemprop": "price"}, "content"),
-        ("span", {"class": "andes-money-amount__fraction"}, "text"),
-        ("span", {"class": "price-tag-fraction"}, "text"),
-    ]
-    for tag, attrs, prop in selectors:
-        el = soup.find(tag, attrs)
-        if el:
-            val = el.get("content") if prop == "content" else el.text
-            price = clean_price(str(val), settings)
+def extract_microdata(url: str, content: bytes, settings: Dict[str, Any]) -> Optional[float]:
+    for tag in META_PRICE_RE.findall(content):
+        match = META_CONTENT_RE.search(tag)
+        if match:
+            price = parse_structured_price(match.group(1).decode("utf-8", errors="replace"), settings)
             if price:
                 return price
     return None
 
 
-def check_amazon(soup: BeautifulSoup, settings: Dict[str, Any]) -> Optional[float]:
-    selectors = [
-        "span.a-price-whole",
-        ".a-offscreen",
-        "#priceblock_ourprice",
-        "#priceblock_dealprice",
-        "span[data-a-color='price'] .a-offscreen",
-    ]
-    for selector in selectors:
-        el = soup.select_one(selector)
-        if el:
-            price = clean_price(el.text, settings)
+# ─── Registro de Extractores por Tienda ───
+
+# Selectores CSS por tienda; "selector@atributo" lee un atributo en lugar del texto.
+BUILTIN_EXTRACTORS: Dict[str, Dict[str, Any]] = {
+    "mercadolibre": {
+        "selectors": [
+            "meta[itemprop='price']@content",
+            "span.andes-money-amount__fraction",
+            "span.price-tag-fraction",
+        ],
+    },
+    "amazon": {
+        "selectors": [
+            "span.a-price-whole",
+            ".a-offscreen",
+            "#priceblock_ourprice",
+            "#priceblock_dealprice",
+            "span[data-a-color='price'] .a-offscreen",
+        ],
+    },
+}
+DEFAULT_STRAIN_TAGS = ["meta", "span"]
+
+
+class DomainExtractor:
+    """Selectores precompilados de una tienda; prueba primero el que acertó la última vez."""
+
+    def __init__(self, key: str, selectors: List[str], tags: Optional[List[str]] = None):
+        self.key      = key
+        self.compiled = []
+        for spec in selectors:
+            css, _, attr = spec.partition("@")
+            self.compiled.append((spec, soupsieve.compile(css), attr or None))
+        self.strainer = SoupStrainer(tags or DEFAULT_STRAIN_TAGS)
+        self._lock    = threading.Lock()
+        self.last_hit = 0
+        self.pages    = 0
+        self.attempts = 0
+
+    def matches(self, host: str) -> bool:
+        """Coincide por dominio exacto, subdominio o etiqueta (ej. 'amazon' → www.amazon.com.mx)."""
+        hostname = host.split(":")[0]
+        return (host == self.key or hostname == self.key
+                or hostname.endswith("." + self.key) or self.key in hostname.split("."))
+
+    def extract(self, soup: BeautifulSoup, settings: Dict[str, Any]) -> Optional[float]:
+        first = self.last_hit
+        order = [first] + [i for i in range(len(self.compiled)) if i != first]
+        tried = 0
+        price = None
+        for index in order:
+            tried += 1
+            _, selector, attr = self.compiled[index]
+            el = selector.select_one(soup)
+            if el is None:
+                continue
+            price = clean_price(str(el.get(attr) if attr else el.text), settings)
             if price:
-                return price
+                self.last_hit = index
+                break
+        with self._lock:
+            self.pages    += 1
+            self.attempts += tried
+        return price
+
+    def summary(self) -> str:
+        with self._lock:
+            avg = self.attempts / self.pages if self.pages else 0
+        return f"{self.key}: {avg:.2f} selector(es)/página, primero '{self.compiled[self.last_hit][0]}'"
+
+
+class ExtractorRegistry:
+    """Extractores por hostname: los incluidos más los definidos en settings.extractors."""
+
+    def __init__(self, config: Dict[str, Dict[str, Any]]):
+        self.config     = config
+        self.extractors = [
+            DomainExtractor(key, spec.get("selectors", []), spec.get("tags"))
+            for key, spec in {**BUILTIN_EXTRACTORS, **config}.items()
+        ]
+        # Los más específicos primero: "tienda.amazon.com" antes que "amazon"
+        self.extractors.sort(key=lambda e: -len(e.key))
+        self._by_host: Dict[str, Optional[DomainExtractor]] = {}
+
+    def lookup(self, url: str) -> Optional[DomainExtractor]:
+        host = get_host(url)
+        if host not in self._by_host:
+            self._by_host[host] = next((e for e in self.extractors if e.matches(host)), None)
+        return self._by_host[host]
+
+    def summary(self) -> List[str]:
+        return [e.summary() for e in self.extractors if e.pages]
+
+
+_registry: Optional[ExtractorRegistry] = None
+
+
+def get_extractor_registry(settings: Dict[str, Any]) -> ExtractorRegistry:
+    """Registro del proceso; se reconstruye solo si cambian los extractores configurados."""
+    global _registry
+    config = settings.get("extractors") or {}
+    if _registry is None or _registry.config != config:
+        _registry = ExtractorRegistry(config)
+    return _registry
+
+
+def extract_subtree(url: str, content: bytes, settings: Dict[str, Any]) -> Optional[float]:
+    extractor = get_extractor_registry(settings).lookup(url)
+    if extractor is None:
+        return None
+    return extractor.extract(BeautifulSoup(content, "html.parser", parse_only=extractor.strainer), settings)
+
+
+def extract_full_dom(url: str, content: bytes, settings: Dict[str, Any]) -> Optional[float]:
+    extractor = get_extractor_registry(settings).lookup(url)
+    if extractor is None:
+        return None
+    return extractor.extract(BeautifulSoup(content, "html.parser"), settings)
+
+
+# Del método más barato al más caro; el DOM completo solo corre como último recurso
+PRICE_STRATEGIES = [
+    ("jsonld",    extract_jsonld),
+    ("microdata", extract_microdata),
+    ("subtree",   extract_subtree),
+    ("full_dom",  extract_full_dom),
+]
+
+
+def extract_price(url: str, content: bytes, settings: Dict[str, Any]) -> Optional[float]:
+    """Extrae el precio de la página probando primero los métodos sin DOM."""
+    for name, strategy in PRICE_STRATEGIES:
+        price = strategy(url, content, settings)
+        if price:
+            record_extraction(name)
+            return price
+
+    record_extraction("miss")
     return None
 
 
@@ -244,96 +1022,842 @@ def evaluar_alertas(product: Dict[str, Any], precio_actual: float, settings: Dic
                 logger.info(f"{nombre} subió {abs(variacion):.1f}% → {precio_fmt}")
 
 
-# ─── Check Principal ───
+# ─── Catálogo de Productos ───
 
-def check_price(product: Dict[str, Any], settings: Dict[str, Any]) -> None:
-    url    = product.get("url", "")
-    nombre = product.get("name", "Producto")
-    moneda = settings.get("currency_code", "$")
+_config_cache: Dict[str, Any] = {"mtime": None, "data": None}
 
-    console.print(f"  [dim]🔍 Verificando:[/dim] {nombre}...")
 
+def file_mtime(path: str) -> Optional[int]:
     try:
-        time.sleep(random.uniform(1.5, 4.0))
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
-        response = requests.get(url, headers=get_headers(), timeout=15)
-        if response.status_code != 200:
-            console.print(f"     [yellow]⚠️  HTTP {response.status_code}[/yellow]")
-            logger.warning(f"{nombre}: HTTP {response.status_code}")
-            return
 
-        soup         = BeautifulSoup(response.content, "html.parser")
-        access_token = settings.get("ml_access_token", "")
-        price        = None
+def load_monitor_config() -> Dict[str, Any]:
+    """Carga productos_a_monitorear.json solo si cambió desde la última lectura."""
+    mtime = file_mtime(os.path.join(get_project_root(), CONFIG_FILE))
+    if _config_cache["data"] is None or mtime != _config_cache["mtime"]:
+        _config_cache["data"]  = load_json_config(CONFIG_FILE)
+        _config_cache["mtime"] = mtime
+    return _config_cache["data"]
+
+
+class ProductCatalog:
+    """Catálogo de productos en JSON, JSONL o SQLite que se relee solo cuando cambia su mtime.
+
+    JSONL y SQLite se leen producto por producto; cada relectura se compara con la anterior
+    para reportar solo los productos agregados, modificados o eliminados.
+    """
+
+    def __init__(self, path: str, table: str = CATALOG_TABLE):
+        self.path   = path
+        self.table  = table
+        self._mtime: Optional[Tuple[Optional[int], ...]] = None
+        self.products: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def kind(self) -> str:
+        ext = os.path.splitext(self.path)[1].lower()
+        if ext == ".jsonl":
+            return "jsonl"
+        if ext in (".db", ".sqlite", ".sqlite3"):
+            return "sqlite"
+        return "json"
+
+    def _current_mtime(self) -> Tuple[Optional[int], ...]:
+        if self.kind == "sqlite":
+            return (file_mtime(self.path), file_mtime(self.path + "-wal"))
+        return (file_mtime(self.path),)
+
+    def _iter_source(self) -> Iterator[Dict[str, Any]]:
+        if self.kind == "jsonl":
+            with open(self.path, "r", encoding="utf-8") as f:
+                for number, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        logger.warning(f"Catálogo {self.path}:{number} inválido: {e}")
+        elif self.kind == "sqlite":
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            try:
+                for row in conn.execute(f'SELECT * FROM "{self.table}"'):
+                    yield {key: row[key] for key in row.keys() if row[key] is not None}
+            finally:
+                conn.close()
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            yield from data if isinstance(data, list) else data.get("products", [])
+
+    def refresh(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Relee el catálogo si cambió. Devuelve (agregados o modificados, URLs eliminadas)."""
+        mtime = self._current_mtime()
+        if mtime == self._mtime:
+            return [], []
+        if mtime[0] is None:
+            if self._mtime is not None:
+                print_error(f"No se encontró el catálogo {self.path}")
+            self._mtime = mtime
+            return [], []
+
+        try:
+            current = {}
+            for product in self._iter_source():
+                url = product.get("url") if isinstance(product, dict) else None
+                if url:
+                    current[url] = product
+        except Exception as e:
+            print_error(f"No se pudo leer el catálogo {self.path}: {e}")
+            return [], []
+
+        changed = [p for url, p in current.items() if self.products.get(url) != p]
+        removed = [url for url in self.products if url not in current]
+        self.products, self._mtime = current, mtime
+        if changed or removed:
+            logger.info(f"Catálogo {self.path}: {len(changed)} nuevo(s)/modificado(s), {len(removed)} eliminado(s)")
+        return changed, removed
+
+    def iter_products(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.products.values())
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+
+_catalog: Optional[ProductCatalog] = None
+
+
+def get_catalog(settings: Dict[str, Any]) -> ProductCatalog:
+    """Catálogo indicado en settings.catalog (o los productos del JSON principal)."""
+    global _catalog
+    path = settings.get("catalog") or CONFIG_FILE
+    if not os.path.isabs(path):
+        path = os.path.join(get_project_root(), path)
+    table = settings.get("catalog_table", CATALOG_TABLE)
+    if _catalog is None or _catalog.path != path or _catalog.table != table:
+        _catalog = ProductCatalog(path, table)
+    return _catalog
+
+
+# ─── Motor Concurrente ───
+
+class RoundStopped(Exception):
+    """La ronda se interrumpió (Ctrl-C) mientras el producto esperaba su turno."""
+
+
+class HostThrottle:
+    """Limita las peticiones simultáneas por host y las espacia con un delay aleatorio."""
+
+    def __init__(self, per_host: int = DEFAULT_PER_HOST_CONCURRENCY,
+                 delay_range: Tuple[float, float] = DEFAULT_REQUEST_DELAY):
+        self.per_host    = max(1, per_host)
+        self.delay_range = delay_range
+        self._lock       = threading.Lock()
+        self._slots: Dict[str, threading.Semaphore] = {}
+        self._next_at: Dict[str, float] = {}
+        self._stopped    = threading.Event()
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "HostThrottle":
+        delay_min = float(settings.get("request_delay_min", DEFAULT_REQUEST_DELAY[0]))
+        delay_max = float(settings.get("request_delay_max", DEFAULT_REQUEST_DELAY[1]))
+        return cls(
+            per_host=int(settings.get("per_host_concurrency", DEFAULT_PER_HOST_CONCURRENCY)),
+            delay_range=(delay_min, max(delay_min, delay_max)),
+        )
 
-        if "mercadolibre" in url:
-            price = check_mercadolibre(url, soup, settings, access_token)
-        elif "amazon" in url:
-            price = check_amazon(soup, settings)
+    @contextmanager
+    def slot(self, host: str) -> Iterator[None]:
+        """Ocupa un cupo del host y espera su turno antes de dejar pasar la petición."""
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.Semaphore(self.per_host))
+        with sem:
+            self._wait_turn(host)
+            yield
+
+    def defer(self, host: str, seconds: float) -> None:
+        """Retrasa la próxima petición al host (ej. para respetar Retry-After)."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._next_at[host] = max(self._next_at.get(host, 0.0), until)
+
+    def stop(self) -> None:
+        """Despierta a los productos que esperan turno; ya no saldrá ninguna petición."""
+        self._stopped.set()
+
+    def _wait_turn(self, host: str) -> None:
+        if self._stopped.is_set():
+            raise RoundStopped()
+        with self._lock:
+            now   = time.monotonic()
+            start = max(now, self._next_at.get(host, now))
+            self._next_at[host] = start + random.uniform(*self.delay_range)
+        if start > now and self._stopped.wait(start - now):
+            raise RoundStopped()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Interpreta Retry-After en segundos o como fecha HTTP."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
-        if price is None:
-            console.print(f"     [red]❌ No se pudo detectar el precio.[/red]")
-            logger.warning(f"{nombre}: precio no detectado en {url}")
+
+class CircuitBreaker:
+    """Salud por host: tras fallos repetidos (403/429/503/timeouts) omite el host durante un cooldown.
+
+    Pasado el cooldown deja pasar una sola petición de prueba; si falla, el circuito se vuelve a abrir.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_CIRCUIT_THRESHOLD, cooldown: float = DEFAULT_CIRCUIT_COOLDOWN):
+        self.threshold = max(1, threshold)
+        self.cooldown  = cooldown
+        self._lock     = threading.Lock()
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._probing: set = set()
+        self.skipped: Counter = Counter()
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        self.threshold = max(1, int(settings.get("circuit_failure_threshold", DEFAULT_CIRCUIT_THRESHOLD)))
+        self.cooldown  = float(settings.get("circuit_cooldown_seconds", DEFAULT_CIRCUIT_COOLDOWN))
+        with self._lock:
+            self.skipped.clear()
+            self._probing.clear()
+
+    def allow(self, host: str, probe: bool = True) -> bool:
+        """True si se puede consultar el host; cuenta la omisión si no.
+
+        Con probe=False solo consulta el estado, sin reservar la petición de prueba.
+        """
+        with self._lock:
+            until = self._open_until.get(host)
+            if until is None:
+                return True
+            if time.monotonic() >= until and host not in self._probing:
+                if probe:
+                    self._probing.add(host)  # semiabierto: una sola petición de prueba
+                return True
+            self.skipped[host] += 1
+            return False
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+            self._probing.discard(host)
+
+    def record_failure(self, host: str, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            failures = self._failures[host] = self._failures.get(host, 0) + 1
+            probing  = host in self._probing
+            self._probing.discard(host)
+            long_wait = retry_after is not None and retry_after > RETRY_AFTER_MAX_WAIT
+            if failures < self.threshold and not probing and not long_wait:
+                return
+            cooldown     = max(self.cooldown, retry_after or 0)
+            already_open = host in self._open_until and not probing
+            self._open_until[host] = max(self._open_until.get(host, 0.0), time.monotonic() + cooldown)
+        if already_open:
             return
+        console.print(f"  [red]🚫 {host} bloqueado ({failures} fallo(s)); se omite por {cooldown:.0f}s[/red]")
+        logger.warning(f"Circuito abierto para {host}: {failures} fallo(s), cooldown {cooldown:.0f}s")
+
+
+# Estado de salud compartido entre rondas (el modo continuo conserva los cooldowns)
+domain_health = CircuitBreaker()
+
 
-        console.print(f"     [green]💰 Precio:[/green] {format_price(price, settings)}")
+def interleave_by_host(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reordena los productos alternando hosts para que ningún dominio acapare los workers."""
+    queues: Dict[str, List[Dict[str, Any]]] = {}
+    for product in products:
+        queues.setdefault(get_host(product.get("url", "")), []).append(product)
+
+    ordered = []
+    pending = [list(reversed(q)) for q in queues.values()]
+    while pending:
+        for q in pending:
+            ordered.append(q.pop())
+        pending = [q for q in pending if q]
+    return ordered
 
-        guardar_precio(nombre, url, price, moneda)
-        evaluar_alertas(product, price, settings)
 
+# ─── Check Principal ───
+
+def procesar_precio(product: Dict[str, Any], price: float, settings: Dict[str, Any], note: str = "") -> None:
+    """Muestra, evalúa alertas y guarda una lectura de precio ya obtenida."""
+    nombre = product.get("name", "Producto")
+    console.print(f"  [green]💰 {nombre}:[/green] {format_price(price, settings)}{note}")
+    evaluar_alertas(product, price, settings)
+    guardar_precio(nombre, product.get("url", ""), price, settings.get("currency_code", "$"))
+
+
+def prefetch_mercadolibre(products: List[Dict[str, Any]],
+                          settings: Dict[str, Any]) -> Tuple[Dict[str, float], List[Dict[str, Any]]]:
+    """Resuelve por API en lote los productos de MercadoLibre.
+
+    Devuelve los precios resueltos por URL y los productos que aún requieren scraping.
+    """
+    access_token = settings.get("ml_access_token", "")
+    if not access_token:
+        return {}, products
+
+    by_item: Dict[str, List[Dict[str, Any]]] = {}
+    for product in products:
+        url     = product.get("url", "")
+        item_id = extract_ml_item_id(url) if "mercadolibre" in url else None
+        if item_id:
+            by_item.setdefault(item_id.upper(), []).append(product)
+    if not by_item:
+        return {}, products
+
+    prices   = fetch_mercadolibre_prices(list(by_item), access_token)
+    resolved: Dict[str, float] = {}
+    for item_id, price in prices.items():
+        for product in by_item.get(item_id.upper(), []):
+            try:
+                procesar_precio(product, price, settings, " [dim](API)[/dim]")
+                record_extraction("api")
+                resolved[product.get("url", "")] = price
+            except Exception as e:
+                logger.error(f"{product.get('name', 'Producto')}: {e}")
+
+    logger.info(f"ML API multiget: {len(resolved)}/{sum(map(len, by_item.values()))} producto(s) resueltos")
+    return resolved, [p for p in products if p.get("url", "") not in resolved]
+
+
+def check_price(product: Dict[str, Any], settings: Dict[str, Any],
+                throttle: Optional[HostThrottle] = None) -> Optional[float]:
+    """Consulta el precio de un producto, lo guarda y evalúa sus alertas."""
+    url    = product.get("url", "")
+    nombre = product.get("name", "Producto")
+    throttle = throttle or HostThrottle.from_settings(settings)
+
+    host = get_host(url)
+    if not domain_health.allow(host, probe=False):
+        logger.info(f"{nombre}: omitido, circuito abierto para {host}")
+        return None
+
+    try:
+        cached  = obtener_cache_http(url)
+        headers = {**get_headers(), **conditional_headers(cached)}
+        with throttle.slot(host):
+            if not domain_health.allow(host):
+                logger.info(f"{nombre}: omitido, circuito abierto para {host}")
+                return None
+            try:
+                response = http_get(url, headers=headers, timeout=15)
+            except requests.RequestException:
+                # Cualquier error de red cierra la petición de prueba; si no, el host quedaría
+                # marcado como "probando" y no se volvería a consultar
+                domain_health.record_failure(host)
+                raise
+
+        if response.status_code in BLOCKING_STATUSES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            domain_health.record_failure(host, retry_after)
+            if retry_after:
+                throttle.defer(host, min(retry_after, RETRY_AFTER_MAX_WAIT))
+        else:
+            domain_health.record_success(host)
+
+        note = ""
+        if response.status_code == 304 and cached:
+            price = cached[2]
+            note  = " [dim](sin cambios)[/dim]"
+            logger.info(f"{nombre}: 304 Not Modified, precio en caché {price}")
+        elif response.status_code != 200:
+            console.print(f"  [yellow]⚠️  {nombre}: HTTP {response.status_code}[/yellow]")
+            logger.warning(f"{nombre}: HTTP {response.status_code}")
+            return None
+        else:
+            price = extract_price(url, response.content, settings)
+            if price is None:
+                console.print(f"  [red]❌ {nombre}: no se pudo detectar el precio.[/red]")
+                logger.warning(f"{nombre}: precio no detectado en {url}")
+                return None
+            guardar_cache_http(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), price)
+
+        procesar_precio(product, price, settings, note)
+        return price
+
+    except RoundStopped:
+        pass
     except requests.Timeout:
-        console.print(f"     [red]⏱️  Timeout al acceder a {nombre}[/red]")
+        console.print(f"  [red]⏱️  Timeout al acceder a {nombre}[/red]")
         logger.error(f"{nombre}: timeout")
     except Exception as e:
-        console.print(f"     [red]❌ Error:[/red] {e}")
+        console.print(f"  [red]❌ {nombre}: error:[/red] {e}")
         logger.error(f"{nombre}: {e}")
+    return None
 
 
-def run_price_monitor_job() -> None:
-    """Ejecuta una sola ronda del monitor de precios."""
-    init_db()
-    
+def print_round_header(count: int) -> None:
     console.print(f"\n[cyan]{'═'*50}[/cyan]")
-    console.print(f"  [bold]Chequeo:[/bold] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    console.print(f"  [bold]Chequeo:[/bold] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} — {count} producto(s)")
     console.print(f"[cyan]{'═'*50}[/cyan]")
 
-    data     = load_json_config()
-    products = data.get("products", [])
-    settings = data.get("settings", {})
 
+@contextmanager
+def round_session(settings: Dict[str, Any]) -> Iterator[HostThrottle]:
+    """Prepara base, sesiones HTTP, circuito y notificador para una ronda y los cierra al final.
+
+    El modo worker abre una sola sesión por ronda y revisa dentro varios lotes, así las
+    conexiones keep-alive, el estado del circuito y el resumen de alertas abarcan la ronda."""
+    init_db()
+    http_sessions.configure(settings)
+    domain_health.configure(settings)
+    with _stats_lock:
+        extraction_stats.clear()
+    notifier.begin_round(settings)
+    try:
+        yield HostThrottle.from_settings(settings)
+    finally:
+        http_sessions.close()
+        notifier.end_round()
+
+
+def check_products(products: List[Dict[str, Any]], settings: Dict[str, Any],
+                   throttle: HostThrottle) -> Dict[str, Optional[float]]:
+    """Consulta un conjunto de productos en paralelo dentro de una round_session."""
+    max_workers = max(1, int(settings.get("max_workers", DEFAULT_MAX_WORKERS)))
+    results: Dict[str, Optional[float]] = {}
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        with get_store().batch():
+            resolved, pending = prefetch_mercadolibre(products, settings)
+            results.update(resolved)
+            futures = {pool.submit(check_price, p, settings, throttle): p.get("url", "")
+                       for p in interleave_by_host(pending)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        pool.shutdown()
+    except KeyboardInterrupt:
+        # Salir del pool con shutdown(wait=True) esperaría a todos los productos en cola,
+        # delays de cortesía incluidos: se cancelan y se despierta a los que esperan turno
+        throttle.stop()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    return results
+
+
+def report_round(checked: int, found: int, started: float, settings: Dict[str, Any]) -> None:
+    """Resumen de la ronda: estrategias de extracción, selectores y hosts omitidos."""
+    elapsed = time.monotonic() - started
+    summary = extraction_summary()
+    if summary:
+        console.print(f"  [dim]Extracción: {summary}[/dim]")
+        logger.info(f"Estrategias de extracción: {summary}")
+    for line in get_extractor_registry(settings).summary():
+        logger.info(f"Selectores — {line}")
+    for host, count in domain_health.skipped.items():
+        console.print(f"  [yellow]🚫 {host}: {count} producto(s) omitidos por circuito abierto[/yellow]")
+    print_success(f"Chequeo completo — {found}/{checked} producto(s) en {elapsed:.1f}s\n")
+
+
+def run_round(products: List[Dict[str, Any]], settings: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Consulta un conjunto de productos en paralelo y devuelve el precio obtenido por URL."""
+    started = time.monotonic()
+    with round_session(settings) as throttle:
+        results = check_products(products, settings, throttle)
+    found = sum(1 for price in results.values() if price is not None)
+    report_round(len(products), found, started, settings)
+    return results
+
+
+def run_price_monitor_job() -> None:
+    """Ejecuta una sola ronda del monitor de precios."""
+    settings = load_monitor_config().get("settings", {})
+    catalog  = get_catalog(settings)
+    catalog.refresh()
+    products = list(catalog.iter_products())
+
+    print_round_header(len(products))
     if not products:
-        print_warning("No hay productos configurados en productos_a_monitorear.json")
+        print_warning(f"No hay productos configurados en {os.path.basename(catalog.path)}")
         return
 
-    for product in products:
-        check_price(product, settings)
+    run_round(products, settings)
+    if not notifier.flush(timeout=NOTIFY_FLUSH_TIMEOUT):
+        print_warning("Algunas notificaciones de Telegram no se alcanzaron a enviar.")
+
+
+# ─── Programador Adaptativo ───
+
+def obtener_precios_recientes(url: str, limit: int = HISTORY_WINDOW) -> List[float]:
+    """Devuelve las últimas lecturas de una URL (más reciente primero)."""
+    rows = get_store().query(
+        "SELECT precio FROM historial WHERE url = ? ORDER BY fecha DESC LIMIT ?",
+        (url, limit)
+    )
+    return [row[0] for row in rows]
+
+
+class AdaptiveScheduler:
+    """Cola de prioridad con el próximo chequeo de cada producto.
+
+    Los productos cerca de su precio objetivo o con precio volátil se revisan más seguido;
+    los estables se van espaciando, siempre entre min_minutes y max_minutes.
+    """
+
+    def __init__(self, base_minutes: float, min_minutes: float, max_minutes: float):
+        self.base_minutes = base_minutes
+        self.min_minutes  = min(min_minutes, base_minutes)
+        self.max_minutes  = max(max_minutes, base_minutes)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq         = 0
+        self._due: Dict[str, float] = {}
+        self._interval: Dict[str, float] = {}
+        self.products: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_settings(cls, interval_minutes: float, settings: Dict[str, Any]) -> "AdaptiveScheduler":
+        return cls(
+            base_minutes=interval_minutes,
+            min_minutes=float(settings.get("min_interval_minutes", max(1, interval_minutes / 4))),
+            max_minutes=float(settings.get("max_interval_minutes", interval_minutes * 4)),
+        )
 
-    print_success(f"Chequeo completo — {len(products)} producto(s)\n")
+    def apply(self, changed: List[Dict[str, Any]], removed: List[str], now: float) -> None:
+        """Incorpora los cambios del catálogo: los productos nuevos vencen ya, los modificados
+        conservan su turno y los eliminados se olvidan."""
+        for url in removed:
+            self.products.pop(url, None)
+            self._due.pop(url, None)
+            self._interval.pop(url, None)
+        for product in changed:
+            url = product.get("url", "")
+            if url not in self.products:
+                self._push(url, now)
+            self.products[url] = product
+
+    def sync(self, products: List[Dict[str, Any]], now: float) -> None:
+        """Reemplaza la lista completa de productos."""
+        current = {p.get("url", ""): p for p in products if p.get("url")}
+        self.apply(list(current.values()), [url for url in self.products if url not in current], now)
+
+    def _push(self, url: str, due: float) -> None:
+        self._due[url] = due
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, url))
+
+    def pop_due(self, now: float) -> List[Dict[str, Any]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, url = heapq.heappop(self._heap)
+            if self._due.get(url) == when:  # descarta entradas obsoletas
+                del self._due[url]
+                due.append(self.products[url])
+        return due
+
+    def next_due(self) -> Optional[float]:
+        while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def compute_interval(self, product: Dict[str, Any], price: Optional[float]) -> float:
+        """Intervalo en minutos según cercanía al objetivo y volatilidad reciente."""
+        url = product.get("url", "")
+        if price is None:
+            return self.base_minutes
+
+        interval = self.base_minutes
+        target   = product.get("target_price")
+        if target:
+            gap       = max(0.0, (price - target) / target)
+            interval *= min(1.0, max(0.25, gap / NEAR_TARGET_GAP))
+
+        history = obtener_precios_recientes(url)
+        if len(history) >= 3:
+            mean = sum(history) / len(history)
+            std  = (sum((p - mean) ** 2 for p in history) / len(history)) ** 0.5
+            cv   = std / mean if mean else 0.0
+            if cv > 0:
+                interval /= 1 + cv * VOLATILITY_WEIGHT
+            elif interval >= self.base_minutes:
+                interval = max(interval, self._interval.get(url, self.base_minutes) * STABLE_BACKOFF)
+
+        return min(self.max_minutes, max(self.min_minutes, interval))
+
+    def reschedule(self, product: Dict[str, Any], price: Optional[float], now: float) -> float:
+        url      = product.get("url", "")
+        interval = self.compute_interval(product, price)
+        self._interval[url] = interval
+        if url in self.products:
+            self._push(url, now + interval * 60)
+        return interval
 
 
 def run_continuous_monitor(interval_minutes: int = 60) -> None:
-    """Ejecuta el monitor en un loop continuo."""
-    console.print(f"[bold green]🟢 Monitor iniciado.[/bold green] Verificando cada {interval_minutes} minuto(s)...")
+    """Ejecuta el monitor en un loop continuo con un próximo chequeo propio por producto."""
+    console.print(f"[bold green]🟢 Monitor iniciado.[/bold green] Intervalo base de {interval_minutes} minuto(s), ajustado por producto...")
+    scheduler: Optional[AdaptiveScheduler] = None
+    active_catalog: Optional[ProductCatalog] = None
     try:
-        run_price_monitor_job()
         while True:
-            time.sleep(interval_minutes * 60)
-            run_price_monitor_job()
+            settings = load_monitor_config().get("settings", {})
+            catalog  = get_catalog(settings)
+            if scheduler is None:
+                init_db()
+                scheduler = AdaptiveScheduler.from_settings(interval_minutes, settings)
+            changed, removed = catalog.refresh()
+            if catalog is active_catalog:
+                scheduler.apply(changed, removed, time.time())
+            else:
+                scheduler.sync(list(catalog.iter_products()), time.time())
+                active_catalog = catalog
+
+            due = scheduler.pop_due(time.time())
+            if due:
+                print_round_header(len(due))
+                results = run_round(due, settings)
+                now     = time.time()
+                for product in due:
+                    scheduler.reschedule(product, results.get(product.get("url", "")), now)
+
+                next_at = scheduler.next_due()
+                if next_at:
+                    console.print(f"  [dim]Próximo chequeo: {datetime.fromtimestamp(next_at).strftime('%H:%M:%S')}[/dim]")
+            elif not scheduler.products:
+                print_warning(f"No hay productos configurados en {os.path.basename(catalog.path)}")
+
+            next_at = scheduler.next_due()
+            wait    = CONFIG_POLL_SECONDS if next_at is None else next_at - time.time()
+            time.sleep(min(CONFIG_POLL_SECONDS, max(0.0, wait)))
     except KeyboardInterrupt:
         console.print("\n[yellow]Monitor detenido por el usuario.[/yellow]")
+        notifier.flush(timeout=10)
+
+
+# ─── Modo Worker — Cola Compartida ───
+
+def worker_identity() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def current_round(interval_minutes: float, now: Optional[float] = None) -> Tuple[str, float]:
+    """Ronda vigente alineada al intervalo: todos los workers calculan el mismo id.
+
+    El id está en UTC para que workers en distintas zonas horarias compartan la ronda.
+    Devuelve (round_id, inicio de la siguiente ronda en epoch)."""
+    period = max(60.0, interval_minutes * 60)
+    start  = (time.time() if now is None else now) // period * period
+    return datetime.fromtimestamp(start, timezone.utc).strftime("%Y-%m-%d %H:%M"), start + period
+
+
+class WorkQueue:
+    """Cola de productos por ronda guardada en la misma base SQLite.
+
+    Cada worker reclama lotes con un lease que vence; al terminar registra el resultado y
+    suelta el lease. Si un worker muere, sus productos vuelven a la cola cuando el lease expira.
+    """
+
+    def __init__(self, store: PriceStore, worker_id: str, lease_seconds: float):
+        self.store         = store
+        self.worker_id     = worker_id
+        self.lease_seconds = lease_seconds
+
+    def enqueue(self, round_id: str, products: List[Dict[str, Any]]) -> int:
+        """Carga la ronda si ningún worker lo hizo antes. Devuelve los productos encolados."""
+        if self.store.query("SELECT 1 FROM work_queue WHERE round_id = ? LIMIT 1", (round_id,)):
+            return 0
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=WORK_QUEUE_RETENTION_DAYS)).strftime("%Y-%m-%d %H:%M")
+        with self.store.transaction() as conn:
+            if conn.execute("SELECT 1 FROM work_queue WHERE round_id = ? LIMIT 1", (round_id,)).fetchone():
+                return 0
+            conn.execute("DELETE FROM work_queue WHERE round_id < ?", (cutoff,))
+            # El orden intercalado por host reparte cada tienda entre todos los workers
+            rows = [(round_id, p["url"], position, json.dumps(p, ensure_ascii=False))
+                    for position, p in enumerate(interleave_by_host([p for p in products if p.get("url")]))]
+            conn.executemany(
+                "INSERT OR IGNORE INTO work_queue (round_id, url, orden, producto) VALUES (?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def claim(self, round_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Reclama hasta `limit` productos libres o con lease vencido."""
+        now = time.time()
+        with self.store.transaction() as conn:
+            abandoned = conn.execute(
+                "UPDATE work_queue SET hecho = 1, lease_owner = NULL, lease_expira = NULL "
+                "WHERE round_id = ? AND hecho = 0 AND intentos >= ? AND lease_expira < ?",
+                (round_id, LEASE_MAX_ATTEMPTS, now)
+            ).rowcount
+            rows = conn.execute(
+                "SELECT url, producto FROM work_queue "
+                "WHERE round_id = ? AND hecho = 0 AND (lease_owner IS NULL OR lease_expira < ?) "
+                "ORDER BY orden LIMIT ?",
+                (round_id, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE work_queue SET lease_owner = ?, lease_expira = ?, intentos = intentos + 1 "
+                "WHERE round_id = ? AND url = ?",
+                [(self.worker_id, now + self.lease_seconds, round_id, url) for url, _ in rows]
+            )
+        if abandoned:
+            logger.warning(f"Cola {round_id}: {abandoned} producto(s) abandonados tras {LEASE_MAX_ATTEMPTS} leases vencidos")
+        return [json.loads(producto) for _, producto in rows]
+
+    def renew(self, round_id: str) -> None:
+        with self.store.transaction() as conn:
+            conn.execute(
+                "UPDATE work_queue SET lease_expira = ? WHERE round_id = ? AND lease_owner = ? AND hecho = 0",
+                (time.time() + self.lease_seconds, round_id, self.worker_id)
+            )
+
+    @contextmanager
+    def keep_alive(self, round_id: str) -> Iterator[None]:
+        """Renueva los leases del worker mientras dura el bloque."""
+        stop = threading.Event()
+
+        def beat() -> None:
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    self.renew(round_id)
+                except sqlite3.Error as e:
+                    logger.warning(f"No se pudo renovar el lease de {round_id}: {e}")
+
+        thread = threading.Thread(target=beat, name="lease-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, round_id: str, results: Dict[str, Optional[float]]) -> int:
+        """Registra los resultados y suelta los leases. Devuelve cuántos seguían siendo propios."""
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.store.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "UPDATE work_queue SET hecho = 1, precio = ?, worker = ?, fecha = ?, "
+                "lease_owner = NULL, lease_expira = NULL "
+                "WHERE round_id = ? AND url = ? AND lease_owner = ?",
+                [(precio, self.worker_id, fecha, round_id, url, self.worker_id) for url, precio in results.items()]
+            )
+            owned = conn.total_changes - before
+        if owned < len(results):
+            logger.warning(f"Cola {round_id}: {len(results) - owned} lease(s) vencieron antes de terminar")
+        return owned
+
+    def release(self, round_id: str) -> None:
+        """Devuelve a la cola los productos reclamados que no se alcanzaron a procesar."""
+        with self.store.transaction() as conn:
+            conn.execute(
+                "UPDATE work_queue SET lease_owner = NULL, lease_expira = NULL, intentos = intentos - 1 "
+                "WHERE round_id = ? AND lease_owner = ? AND hecho = 0",
+                (round_id, self.worker_id)
+            )
+
+    def progress(self, round_id: str) -> Tuple[int, int, int]:
+        """(total, hechos, workers distintos) de la ronda."""
+        total, done, workers = self.store.query(
+            "SELECT COUNT(*), COALESCE(SUM(hecho), 0), COUNT(DISTINCT worker) FROM work_queue WHERE round_id = ?",
+            (round_id,)
+        )[0]
+        return total, done, workers
+
+
+def run_worker(interval_minutes: int = 60) -> None:
+    """Consume la cola compartida junto con otros workers (mismo host o base compartida)."""
+    global DB_JOURNAL_MODE
+    worker_id = worker_identity()
+    settings  = load_monitor_config().get("settings", {})
+    DB_JOURNAL_MODE = str(settings.get("db_journal_mode", DB_JOURNAL_MODE)).upper()
+    init_db()
+
+    console.print(f"[bold green]🟢 Worker {worker_id} iniciado.[/bold green] Rondas de {interval_minutes} minuto(s) sobre {DB_FILE}")
+    work_queue = WorkQueue(get_store(), worker_id,
+                           float(settings.get("lease_seconds", DEFAULT_LEASE_SECONDS)))
+    round_id, announced = "", ""
+    try:
+        while True:
+            settings   = load_monitor_config().get("settings", {})
+            batch_size = max(1, int(settings.get("worker_batch_size", DEFAULT_WORKER_BATCH)))
+            work_queue.lease_seconds = float(settings.get("lease_seconds", DEFAULT_LEASE_SECONDS))
+            round_id, next_round = current_round(interval_minutes)
+
+            catalog = get_catalog(settings)
+            catalog.refresh()
+            queued = work_queue.enqueue(round_id, list(catalog.iter_products()))
+            if queued:
+                console.print(f"  [dim]Ronda {round_id}: {queued} producto(s) encolados[/dim]")
+
+            claimed = work_queue.claim(round_id, batch_size)
+            if claimed:
+                # Una sola sesión para todos los lotes que este worker tome en la ronda
+                started, checked, found = time.monotonic(), 0, 0
+                with round_session(settings) as throttle:
+                    while claimed:
+                        print_round_header(len(claimed))
+                        with work_queue.keep_alive(round_id):
+                            results = check_products(claimed, settings, throttle)
+                        work_queue.complete(round_id, results)
+                        checked += len(claimed)
+                        found   += sum(1 for price in results.values() if price is not None)
+                        claimed = work_queue.claim(round_id, batch_size)
+                report_round(checked, found, started, settings)
+                continue
+
+            total, done, workers = work_queue.progress(round_id)
+            if total and done >= total:
+                if announced != round_id:
+                    print_success(f"Ronda {round_id} completa: {done} producto(s) entre {workers} worker(s)")
+                    announced = round_id
+                wait = next_round - time.time()
+            elif not total:
+                print_warning(f"No hay productos configurados en {os.path.basename(catalog.path)}")
+                wait = CONFIG_POLL_SECONDS
+            else:
+                # Quedan productos con lease de otros workers; se reintenta por si alguno vence
+                wait = WORKER_IDLE_SECONDS
+            time.sleep(min(CONFIG_POLL_SECONDS, max(0.0, wait)))
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Worker detenido por el usuario.[/yellow]")
+        if round_id:
+            work_queue.release(round_id)
+        notifier.flush(timeout=10)
 
 
 def main():
+    global DB_FILE
     parser = argparse.ArgumentParser(description="Monitor de Precios v2.0")
     parser.add_argument("--now",       action="store_true", help="Ejecutar un chequeo inmediato")
     parser.add_argument("--historial", action="store_true", help="Ver historial de precios")
     parser.add_argument("--interval",  type=int, default=60, help="Intervalo en minutos (default: 60)")
+    parser.add_argument("--reporte",   action="store_true", help="Resumen de mínimos, máximos, promedios y tendencia por producto")
+    parser.add_argument("--dias",      type=int, default=90, help="Días a incluir en el reporte (default: 90)")
+    parser.add_argument("--producto",  help="Filtrar el reporte por nombre o URL")
+    parser.add_argument("--por-hora",  action="store_true", help="Usar agregados por hora en lugar de por día")
+    parser.add_argument("--worker",    action="store_true", help="Consumir la cola compartida junto con otros workers")
+    parser.add_argument("--db",        help="Ruta de la base SQLite (por ejemplo, una compartida entre hosts)")
     args = parser.parse_args()
 
-    if args.historial:
+    if args.db:
+        DB_FILE = os.path.abspath(args.db)
+
+    if args.reporte:
+        mostrar_reporte(args.dias, args.producto, args.por_hora)
+    elif args.historial:
         mostrar_historial()
     elif args.now:
         run_price_monitor_job()
+    elif args.worker:
+        run_worker(args.interval)
     else:
         run_continuous_monitor(args.interval)
 
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from automation_tools.tools import converter
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_manifest_keeps_undecodable_filenames(tmp_path, monkeypatch):
+    source = tmp_path / "fotos"
+    output = tmp_path / "webp"
+    source.mkdir()
+    try:
+        Image.new("RGB", (8, 8)).save(os.fsdecode(os.path.join(os.fsencode(source), b"caf\xe9.png")))
+    except OSError:
+        pytest.skip("el sistema de archivos no admite nombres que no son UTF-8")
+
+    converter.run_mirror_converter(str(source), str(output), "webp", workers=1)
+
+    manifest_path = os.path.join(output, converter.MANIFEST_FILE)
+    assert os.path.exists(manifest_path)
+    assert not os.path.exists(f"{manifest_path}.tmp")
+    manifest = converter.load_manifest(manifest_path, "webp")
+    assert list(manifest) == [os.fsdecode(b"caf\xe9.webp")]
+
+    # La segunda ejecución reconoce la imagen como al día en lugar de reconvertirla
+    converted = []
+    original = converter.convert_batch
+    monkeypatch.setattr(converter, "convert_batch",
+                        lambda files, *args, **kwargs: converted.extend(files) or original(files, *args, **kwargs))
+    converter.run_mirror_converter(str(source), str(output), "webp", workers=1)
+    assert converted == []
@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from automation_tools.tools import duplicate_finder
+
+
+@pytest.fixture
+def undecodable_tree(tmp_path):
+    """Un archivo con nombre que no es UTF-8 válido junto a una copia del mismo tamaño."""
+    directory = os.fsencode(tmp_path)
+    try:
+        with open(os.path.join(directory, b"b\xff.bin"), "wb") as f:
+            f.write(b"x" * 5000)
+    except OSError:
+        pytest.skip("el sistema de archivos no admite nombres que no son UTF-8")
+    with open(os.path.join(directory, b"copia.bin"), "wb") as f:
+        f.write(b"x" * 5000)
+    return str(tmp_path)
+
+
+def test_cache_stores_undecodable_filenames(undecodable_tree, tmp_path_factory):
+    cache_path = str(tmp_path_factory.mktemp("cache") / "hash_cache.db")
+    expected = os.fsdecode(os.path.join(os.fsencode(undecodable_tree), b"b\xff.bin"))
+
+    for _ in range(2):
+        cache = duplicate_finder.HashCache(cache_path)
+        try:
+            groups = duplicate_finder.find_duplicates(undecodable_tree, workers=1, cache=cache)
+        finally:
+            cache.close()
+        assert [sorted(e.path for e in group) for group in groups.values()] == \
+            [sorted([expected, os.path.join(undecodable_tree, "copia.bin")])]
+
+    cache = duplicate_finder.HashCache(cache_path)
+    try:
+        paths = {row[0] for row in cache.conn.execute("SELECT path FROM hashes")}
+    finally:
+        cache.close()
+    assert os.fsencode(expected) in paths
+
+
+def test_cache_evicts_deleted_undecodable_files(undecodable_tree, tmp_path_factory):
+    cache_path = str(tmp_path_factory.mktemp("cache") / "hash_cache.db")
+    cache = duplicate_finder.HashCache(cache_path)
+    try:
+        duplicate_finder.find_duplicates(undecodable_tree, workers=1, cache=cache)
+    finally:
+        cache.close()
+
+    os.remove(os.path.join(os.fsencode(undecodable_tree), b"b\xff.bin"))
+    cache = duplicate_finder.HashCache(cache_path)
+    try:
+        duplicate_finder.find_duplicates(undecodable_tree, workers=1, cache=cache)
+        assert cache.conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0] == 0
+    finally:
+        cache.close()
+
+
+@pytest.mark.parametrize("extension", ["jsonl", "csv"])
+def test_streaming_report_keeps_undecodable_filenames(undecodable_tree, tmp_path_factory, monkeypatch, extension):
+    # Tandas de un registro: cada etapa pasa por archivos temporales en disco
+    monkeypatch.setattr(duplicate_finder.ExternalSorter.__init__, "__defaults__", (1,))
+    output = str(tmp_path_factory.mktemp("reporte") / f"duplicados.{extension}")
+
+    writer = duplicate_finder.find_duplicates_streaming(undecodable_tree, output, workers=1)
+
+    assert (writer.groups, writer.copies) == (1, 1)
+    with open(output, "rb") as f:
+        assert b"b\xff.bin" in f.read()